@@ -1,46 +1,340 @@
-from flask import Blueprint, jsonify, request, current_app, render_template, send_file
-from app.chess_core import ChessGame, BOT_PRESETS
-from app.engine_personas import PERSONA_DEFAULT_ENGINE_TIME
+from flask import Blueprint, request, current_app, render_template, send_file, session, g as request_ctx
+from app.chess_core import ChessGame, BOT_PRESETS, board_to_pgn, get_preset, popen_engine, _DEFAULT_STATE_FILE_PATH
+from app.simulation import run_simulation, run_batch_game
+from app.engine_personas import (
+    PERSONA_DEFAULT_ENGINE_TIME, is_persona_allowed, configure_persona, pick_move_with_multipv, set_rng_seed,
+    list_personas, get_persona_config, set_persona_override, validate_persona_override, reset_persona,
+    reset_all_persona_overrides, export_persona_overrides, import_persona_overrides, flush_persona_overrides,
+)
 import os
 import datetime
 import csv
-import chess.pgn
+import functools
+import glob
+import hashlib
+import shutil
+import subprocess
+import chess.engine
 import traceback
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import orjson
+from werkzeug.exceptions import BadRequest
 
 api_bp = Blueprint("api", __name__)
 
-# Single global game for scaffold; later replace with per-session or DB storage
-game = ChessGame()
+_PERSONA_ENGINE_TIME = float(PERSONA_DEFAULT_ENGINE_TIME)
+
+# Project paths, resolved once at import
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+_GAMES_DIR = os.path.join(_ROOT, 'games')
+_TESTS_DIR = os.path.join(_GAMES_DIR, 'tests')
+os.makedirs(_TESTS_DIR, exist_ok=True)
+# Behind nginx, USE_XSENDFILE=1 hands /api/download_pgn bodies to the proxy via
+# X-Accel-Redirect; it needs `location /protected-games/ { internal; alias <root>/games/; }`.
+_ACCEL_REDIRECT = os.environ.get('USE_XSENDFILE', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+class _BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that does not flush after every record.
+
+    The listener calls flush_batch() once the queue drains, so records that
+    arrive together (a request's [MOVE]/[MOVE-RESULT] pair) share one write.
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for h in self.handlers:
+                getattr(h, 'flush_batch', h.flush)()
+        return self.queue.get(block)
+
+
+# Engine debug log: request threads only enqueue records; a background listener
+# owns the file handle and does the actual disk writes.
+_DBG_PATH = os.path.join(_ROOT, 'engine_debug.log')
+_dbg_queue = queue.Queue(-1)
+_dbg_file_handler = _BatchedRotatingFileHandler(_DBG_PATH, maxBytes=10_000_000, backupCount=3, encoding='utf-8', delay=True)
+# Messages carry their own timestamp, in the log's `[TAG] <iso time> ...` layout.
+_dbg_file_handler.setFormatter(logging.Formatter('%(message)s'))
+_dbg_listener = _BatchingQueueListener(_dbg_queue, _dbg_file_handler)
+_dbg_listener.start()
+atexit.register(_dbg_listener.stop)
+_dbg_log = logging.getLogger('engine_debug')
+_dbg_log.setLevel(logging.INFO)
+_dbg_log.propagate = False
+_dbg_log.addHandler(logging.handlers.QueueHandler(_dbg_queue))
+
+
+def _dbg_record(msg):
+    """Build (but do not emit) a debug record for `msg`."""
+    return _dbg_log.makeRecord(_dbg_log.name, logging.INFO, __file__, 0, msg, None, None)
+
+# Persistent UCI engine for the debug endpoint's one-off comparison, so a debug
+# request does not pay for a fork/exec + UCI handshake. Calls are serialized.
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+def _get_engine(engine_path):
+    """Return the shared engine, starting it on first use. Caller must hold _ENGINE_LOCK."""
+    global _ENGINE
+    if _ENGINE is None:
+        # popen_engine's exit hook quits it if it is still open then
+        _ENGINE = popen_engine(engine_path)
+    return _ENGINE
+
+def _quit_engine():
+    global _ENGINE
+    eng, _ENGINE = _ENGINE, None
+    if eng is not None:
+        try:
+            eng.quit()
+        except Exception:
+            pass
+
+# Per-session games keyed by the `gid` session cookie. Entries are kept in
+# least-recently-used order and evicted after _GAME_TTL seconds idle or when the
+# table grows past _GAMES_MAX. Each game has its own lock, held for the rest of
+# the request that fetched it, so concurrent requests from one session serialize.
+# Engines are capped separately in chess_core, so an entry past that cap only
+# costs its board and state file.
+_GAME_TTL = 3600
+_GAMES_MAX = 1000
+_GAMES = OrderedDict()  # gid -> [ChessGame, RLock, last_seen]
+_GAMES_LOCK = threading.RLock()
+
+
+def _evict_game(entry):
+    old = entry[0]
+    try:
+        old.close_engine()
+        old.close_state()
+    except Exception:
+        pass
+    try:
+        if old.game_id and os.path.exists(old.state_file_path):
+            os.remove(old.state_file_path)
+    except Exception:
+        pass
+
+
+def sweep_state_files():
+    """Remove per-session state files untouched for _GAME_TTL seconds.
+
+    They are only removed on eviction, so files of games that were still live when
+    a process exited pile up. Newer ones are kept: they may belong to a running
+    worker, or to a session that picks its game back up after a restart.
+    """
+    base, ext = os.path.splitext(_DEFAULT_STATE_FILE_PATH)
+    cutoff = time.time() - _GAME_TTL
+    for path in glob.glob(f"{glob.escape(base)}_*{ext}"):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _get_game():
+    """Return the ChessGame for the current session, creating one on first use."""
+    held = getattr(request_ctx, '_chess_game', None)
+    if held is not None:
+        return held
+    gid = session.get('gid')
+    if not gid:
+        gid = uuid.uuid4().hex
+        session['gid'] = gid
+    now = time.monotonic()
+    evicted = []
+    with _GAMES_LOCK:
+        entry = _GAMES.get(gid)
+        if entry is None:
+            entry = [ChessGame(game_id=gid), threading.RLock(), now]
+            _GAMES[gid] = entry
+        else:
+            entry[2] = now
+            _GAMES.move_to_end(gid)
+        while _GAMES:
+            oldest_gid, oldest = next(iter(_GAMES.items()))
+            if oldest_gid == gid or (len(_GAMES) <= _GAMES_MAX and now - oldest[2] < _GAME_TTL):
+                break
+            evicted.append(_GAMES.pop(oldest_gid))
+    for old in evicted:
+        _evict_game(old)
+    entry[1].acquire()
+    request_ctx._chess_game = entry[0]
+    request_ctx._chess_game_lock = entry[1]
+    return entry[0]
+
+
+@api_bp.teardown_app_request
+def _release_game(exc):
+    lock = getattr(request_ctx, '_chess_game_lock', None)
+    if lock is not None:
+        request_ctx._chess_game_lock = None
+        request_ctx._chess_game = None
+        lock.release()
+
 
 # Feature gate for v1: when True, hide Free Board / Study features and related endpoints
 V1_MODE = False
 
 from functools import wraps
 
+
+def _json_response(payload, status=200):
+    """Serialize `payload` with orjson and wrap it in a JSON response."""
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+# Constant error bodies ({"ok": false, "error": <code>}) are serialized once per code.
+_ERR_BODIES = {}
+
+
+def _err(error, status):
+    """Error response for a fixed error code; the body bytes are cached and reused."""
+    body = _ERR_BODIES.get(error)
+    if body is None:
+        body = _ERR_BODIES[error] = orjson.dumps({'ok': False, 'error': error})
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def _read_json():
+    """Parse the request body once with orjson. Returns a dict ({} when empty or not an object)."""
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        raise BadRequest('invalid_json')
+    return data if isinstance(data, dict) else {}
+
+def _num(d, key, default, cast=float):
+    """Coerce `d[key]` with `cast`; missing, null or unparseable values give `default`."""
+    v = d.get(key)
+    if v is None:
+        return default
+    # JSON numbers (the common case) need no parsing
+    if type(v) is cast or (type(v) is int and cast is float):
+        return cast(v)
+    try:
+        return cast(v)
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def _maybe_int(v):
+    """int(v) when possible; otherwise `v` unchanged (None stays None)."""
+    if v is None:
+        return v
+    try:
+        return int(v)
+    except (TypeError, ValueError, OverflowError):
+        return v
+
+
+# Preset engine times pre-converted to float, keyed like BOT_PRESETS
+_PRESET_TIME_CACHE = {}
+
+def _refresh_preset_time_cache():
+    _PRESET_TIME_CACHE.clear()
+    for k, v in BOT_PRESETS.items():
+        try:
+            if v.get('engine_time') is not None:
+                _PRESET_TIME_CACHE[k] = float(v['engine_time'])
+        except (TypeError, ValueError):
+            pass
+
+_refresh_preset_time_cache()
+
+def _apply_opponent_preset(data, engine_persona, engine_time, engine_skill):
+    """Fill engine params from `data['opponent_preset']` where the caller did not set them."""
+    opponent_preset = data.get('opponent_preset')
+    preset = get_preset(opponent_preset)
+    if not preset:
+        return engine_persona, engine_time, engine_skill
+    key = opponent_preset.lower()
+    if engine_persona is None:
+        engine_persona = preset.get('engine_persona')
+    # only set engine_time/skill when not explicitly provided
+    if data.get('engine_time') is None and key in _PRESET_TIME_CACHE:
+        engine_time = _PRESET_TIME_CACHE[key]
+    if data.get('engine_skill') is None and 'engine_skill' in preset:
+        try:
+            engine_skill = int(preset['engine_skill']) if preset['engine_skill'] is not None else None
+        except (TypeError, ValueError):
+            pass
+    return engine_persona, engine_time, engine_skill
+
+
+
 def v1_guard(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
         if V1_MODE:
-            return jsonify({'ok': False, 'error': 'disabled_in_v1'}), 404
+            return _err('disabled_in_v1', 404)
         return f(*args, **kwargs)
     return wrapper
 
 
-def state_payload():
-    return {"fen": game.get_fen(), "legal_moves": game.legal_moves()}
+def _cached_fen(g):
+    """FEN of `g.board`, memoized until the move stack changes or the cache is invalidated."""
+    stack = g.board.move_stack
+    key = (id(g.board), len(stack), stack[-1] if stack else None)
+    if getattr(g, '_fen_cache_key', None) != key:
+        g._fen_cache = g.get_fen()
+        g._fen_cache_key = key
+    return g._fen_cache
+
+
+def _invalidate_fen_cache(g):
+    # needed whenever the position can change without a push (reset, set_fen, state reload)
+    g._fen_cache_key = None
+
+
+def _exclude_requested(what):
+    """True when the query string asks to leave out `what`, e.g. ?exclude=legal."""
+    return what in request.args.get('exclude', '').split(',')
+
+
+def state_payload(include_legal=True):
+    """FEN plus, unless `include_legal` is False, the legal moves (full move generation)."""
+    game = _get_game()
+    payload = {"fen": _cached_fen(game)}
+    if include_legal:
+        payload["legal_moves"] = game.legal_moves()
+    return payload
 
 
 @api_bp.route("/api/state", methods=["GET"])
 def api_state():
-    return jsonify(state_payload())
+    return _json_response(state_payload())
 
 
 @api_bp.route("/api/move", methods=["POST"])
 def api_move():
-    data = request.get_json() or {}
+    game = _get_game()
+    data = _read_json()
     uci = data.get("uci")
     if not uci:
-        return jsonify({"ok": False, "error": "missing_uci"}), 400
+        return _err('missing_uci', 400)
     
     # Store player info if provided (for PGN generation later)
     if 'user_name' in data:
@@ -52,76 +346,41 @@ def api_move():
     elif 'engine_persona' in data:
         game.opponent_name = data.get('engine_persona') or 'Opponent'
     
-    ok, err = game.make_move(uci)
+    ok, err = game.make_move(uci, prefetch=bool(data.get("engine_reply")))
+    _invalidate_fen_cache(game)
     if not ok:
-        return jsonify({"ok": False, "error": err}), 400
+        return _json_response({"ok": False, "error": err}, 400)
     # Optionally make engine reply
     reply = None
+    fen = None
     if data.get("engine_reply"):
         # read optional engine params
-        try:
-            engine_time = float(data.get("engine_time", 0.1))
-        except Exception:
-            engine_time = 0.1
+        engine_time = _num(data, "engine_time", 0.1)
         # Parse engine parameters: separate numeric skill and persona string
+        engine_skill = _num(data, "engine_skill", None, int)
         engine_persona = data.get('engine_persona')
         # If client selected an `opponent_preset`, map it to canonical engine params
         # from `BOT_PRESETS`. Preserve explicit engine_persona/engine_skill if
         # provided by the caller; otherwise use preset defaults.
-        opponent_preset = data.get('opponent_preset')
-        if opponent_preset:
-            try:
-                preset = BOT_PRESETS.get(opponent_preset.lower())
-                if preset:
-                    if engine_persona is None:
-                        engine_persona = preset.get('engine_persona')
-                    # only set engine_time/skill when not explicitly provided
-                    if 'engine_time' in preset and data.get('engine_time') is None:
-                        try:
-                            engine_time = float(preset.get('engine_time', engine_time))
-                        except Exception:
-                            pass
-                    if 'engine_skill' in preset and data.get('engine_skill') is None:
-                        try:
-                            engine_skill = int(preset.get('engine_skill')) if preset.get('engine_skill') is not None else None
-                        except Exception:
-                            pass
-            except Exception:
-                pass
+        engine_persona, engine_time, engine_skill = _apply_opponent_preset(data, engine_persona, engine_time, engine_skill)
         # validate persona name if provided
-        try:
-            from app.engine_personas import is_persona_allowed
-            if engine_persona and not is_persona_allowed(engine_persona):
-                return jsonify({"ok": False, "error": "unknown_persona"}), 400
-        except Exception:
-            pass
-        try:
-            engine_skill = data.get("engine_skill")
-            engine_skill = int(engine_skill) if engine_skill is not None else None
-        except Exception:
-            engine_skill = None
+        if engine_persona and not is_persona_allowed(engine_persona):
+            return _err('unknown_persona', 400)
         # optional RNG seed for deterministic sampling
-        engine_rng_seed = data.get('rng_seed') if 'rng_seed' in data else None
-        if engine_rng_seed is not None:
-            try:
-                engine_rng_seed = int(engine_rng_seed)
-            except Exception:
-                pass
+        engine_rng_seed = _maybe_int(data.get('rng_seed'))
         # If a persona is provided, use internal default engine time for persona-driven replies
         if engine_persona:
-            try:
-                engine_time = float(PERSONA_DEFAULT_ENGINE_TIME)
-            except Exception:
-                pass
-        # Log debug to file for diagnosis
+            engine_time = _PERSONA_ENGINE_TIME
+        # Log debug to file for diagnosis (held back so it is written with the result line)
+        pre_rec = None
+        if _dbg_log.isEnabledFor(logging.INFO):
+            pre_rec = _dbg_record(f"[MOVE] {datetime.datetime.now().isoformat()} uci={uci} fen={game.get_fen()} time={engine_time} engine_skill={engine_skill} engine_persona={engine_persona}")
         try:
-            root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            dbg = os.path.join(root, 'engine_debug.log')
-            with open(dbg, 'a', encoding='utf-8') as fh:
-                fh.write(f"[MOVE] {datetime.datetime.now().isoformat()} uci={uci} fen={game.get_fen()} time={engine_time} engine_skill={engine_skill} engine_persona={engine_persona}\n")
-        except Exception:
-            pass
-        reply = game.engine_move(limit=engine_time, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=engine_rng_seed)
+            reply = game.engine_move(limit=engine_time, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=engine_rng_seed)
+        finally:
+            if pre_rec is not None:
+                _dbg_log.handle(pre_rec)
+        _invalidate_fen_cache(game)  # engine_move reloads the shared state before searching
         # FIX: if engine returned None but made a move (engine pushed to board), recover it
         if reply is None:
             try:
@@ -133,135 +392,109 @@ def api_move():
                             pass
             except Exception:
                 pass
-        try:
-            with open(dbg, 'a', encoding='utf-8') as fh:
-                fh.write(f"[MOVE-RESULT] {datetime.datetime.now().isoformat()} reply={repr(reply)} fen={game.get_fen()} engine_skill={engine_skill} engine_persona={engine_persona} rng_seed={engine_rng_seed}\n")
-        except Exception:
-            pass
+        fen = _cached_fen(game)
+        if _dbg_log.isEnabledFor(logging.INFO):
+            _dbg_log.info(f"[MOVE-RESULT] {datetime.datetime.now().isoformat()} reply={repr(reply)} fen={fen} engine_skill={engine_skill} engine_persona={engine_persona} rng_seed={engine_rng_seed}")
+    if fen is None:
+        fen = _cached_fen(game)
     # After applying player move (and optional engine reply), check game-over state
     is_over, reason, winner = game.check_game_over()
     if is_over:
         end_payload = game.end_game(reason, winner)
         # Do NOT auto-save or reset here; return final state to client for user confirmation
-        return jsonify({"ok": True, "fen": game.get_fen(), "move_uci": uci, "engine_reply": reply, "game_over": True, "reason": end_payload.get('reason'), "result": end_payload.get('result'), "pgn": end_payload.get('pgn')})
+        return _json_response({"ok": True, "fen": fen, "move_uci": uci, "engine_reply": reply, "game_over": True, "reason": end_payload.get('reason'), "result": end_payload.get('result'), "pgn": end_payload.get('pgn')})
 
-    return jsonify({"ok": True, "fen": game.get_fen(), "move_uci": uci, "engine_reply": reply, "game_over": False, "reason": None, "result": None, "pgn": None})
+    return _json_response({"ok": True, "fen": fen, "move_uci": uci, "engine_reply": reply, "game_over": False, "reason": None, "result": None, "pgn": None})
 
 
 @api_bp.route("/api/reset", methods=["POST"])
 def api_reset():
+    game = _get_game()
     game.reset()
+    _invalidate_fen_cache(game)
     # paranoia: ensure ACTIVE even if reset gets modified later
     try:
         game.status = 'ACTIVE'
     except Exception:
         pass
-    return jsonify(state_payload())
+    # Clients that only read the FEN (the UI) can skip move generation with ?exclude=legal
+    return _json_response(state_payload(include_legal=not _exclude_requested('legal')))
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_fen(fen):
+    # Shared parsed boards for repeatedly probed positions; callers must copy.
+    return chess.Board(fen)
 
 
 @api_bp.route("/api/set_fen", methods=["POST"])
 def api_set_fen():
-    data = request.get_json() or {}
+    game = _get_game()
+    data = _read_json()
     fen = data.get('fen')
     if not fen:
-        return jsonify({"ok": False, "error": "missing_fen"}), 400
+        return _err('missing_fen', 400)
     try:
         # Validate and set the board to provided FEN
-        game.board = chess.Board(fen)
-        return jsonify({"ok": True, "fen": game.get_fen()})
+        game.board = _parse_fen(fen).copy(stack=False)
+        _invalidate_fen_cache(game)
+        return _json_response({"ok": True, "fen": _cached_fen(game)})
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 400
+        return _json_response({"ok": False, "error": str(e)}, 400)
 
 
 @api_bp.route("/api/analyze", methods=["POST"])
 def api_analyze():
-    data = request.get_json() or {}
+    game = _get_game()
+    data = _read_json()
     fen = data.get('fen')
     if not fen:
-        return jsonify({'ok': False, 'error': 'missing_fen'}), 400
+        return _err('missing_fen', 400)
     try:
-        try:
-            time_limit = float(data.get('time_limit', 0.5))
-        except Exception:
-            time_limit = 0.5
+        time_limit = _num(data, 'time_limit', 0.5)
         # Call the ChessGame analyze helper
         res = game.analyze_position(fen, time_limit=time_limit)
         if isinstance(res, dict) and res.get('error'):
-            return jsonify({'ok': False, 'error': res.get('error')}), 500
+            return _json_response({'ok': False, 'error': res.get('error')}, 500)
         out = {'ok': True}
         if isinstance(res, dict):
             out.update(res)
         else:
             out['result'] = res
-        return jsonify(out)
+        return _json_response(out)
     except Exception as e:
         traceback.print_exc()
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 @api_bp.route("/api/engine_move", methods=["POST"])
 def api_engine_move():
-    data = request.get_json() or {}
-    try:
-        engine_time = float(data.get("engine_time", 0.1))
-    except Exception:
-        engine_time = 0.1
-    try:
-        engine_skill = data.get("engine_skill")
-        engine_skill = int(engine_skill) if engine_skill is not None else None
-    except Exception:
-        engine_skill = None
+    game = _get_game()
+    data = _read_json()
+    engine_time = _num(data, "engine_time", 0.1)
+    engine_skill = _num(data, "engine_skill", None, int)
 
     engine_persona = data.get('engine_persona')
     # Map opponent preset to canonical engine params when provided
-    opponent_preset = data.get('opponent_preset')
-    if opponent_preset:
-        try:
-            preset = BOT_PRESETS.get(opponent_preset.lower())
-            if preset:
-                if engine_persona is None:
-                    engine_persona = preset.get('engine_persona')
-                if data.get('engine_time') is None and 'engine_time' in preset:
-                    try:
-                        engine_time = float(preset.get('engine_time', engine_time))
-                    except Exception:
-                        pass
-                if data.get('engine_skill') is None and 'engine_skill' in preset:
-                    try:
-                        engine_skill = int(preset.get('engine_skill')) if preset.get('engine_skill') is not None else None
-                    except Exception:
-                        pass
-        except Exception:
-            pass
-    try:
-        from app.engine_personas import is_persona_allowed
-        if engine_persona and not is_persona_allowed(engine_persona):
-            return jsonify({"ok": False, "error": "unknown_persona"}), 400
-    except Exception:
-        pass
-    engine_rng_seed = data.get('rng_seed') if 'rng_seed' in data else None
-    if engine_rng_seed is not None:
-        try:
-            engine_rng_seed = int(engine_rng_seed)
-        except Exception:
-            pass
+    engine_persona, engine_time, engine_skill = _apply_opponent_preset(data, engine_persona, engine_time, engine_skill)
+    if engine_persona and not is_persona_allowed(engine_persona):
+        return _err('unknown_persona', 400)
+    engine_rng_seed = _maybe_int(data.get('rng_seed'))
     # If a persona is provided, use internal default engine time for persona-driven
     # move selection. This avoids exposing the previous fast/deep UI which behaved
     # inconsistently when personas used MultiPV sampling.
     if engine_persona:
-        try:
-            engine_time = float(PERSONA_DEFAULT_ENGINE_TIME)
-        except Exception:
-            pass
+        engine_time = _PERSONA_ENGINE_TIME
 
-    # Log debug to file
+    # Log debug to file (held back so it is written with the result line)
+    pre_rec = None
+    if _dbg_log.isEnabledFor(logging.INFO):
+        pre_rec = _dbg_record(f"[ENGINE_MOVE] {datetime.datetime.now().isoformat()} fen={game.get_fen()} time={engine_time} engine_skill={engine_skill} engine_persona={engine_persona}")
     try:
-        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        dbg = os.path.join(root, 'engine_debug.log')
-        with open(dbg, 'a', encoding='utf-8') as fh:
-            fh.write(f"[ENGINE_MOVE] {datetime.datetime.now().isoformat()} fen={game.get_fen()} time={engine_time} engine_skill={engine_skill} engine_persona={engine_persona}\n")
-    except Exception:
-        pass
-    reply = game.engine_move(limit=engine_time, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=engine_rng_seed)
+        reply = game.engine_move(limit=engine_time, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=engine_rng_seed)
+    finally:
+        if pre_rec is not None:
+            _dbg_log.handle(pre_rec)
+    _invalidate_fen_cache(game)
     # FIX: if engine returned None but made a move, recover it from the board move stack
     if reply is None:
         try:
@@ -273,24 +506,23 @@ def api_engine_move():
                         pass
         except Exception:
             pass
-    try:
-        with open(dbg, 'a', encoding='utf-8') as fh:
-            fh.write(f"[ENGINE_MOVE_RESULT] {datetime.datetime.now().isoformat()} reply={repr(reply)} fen={game.get_fen()} engine_skill={engine_skill} engine_persona={engine_persona} rng_seed={engine_rng_seed}\n")
-    except Exception:
-        pass
+    fen = _cached_fen(game)
+    if _dbg_log.isEnabledFor(logging.INFO):
+        _dbg_log.info(f"[ENGINE_MOVE_RESULT] {datetime.datetime.now().isoformat()} reply={repr(reply)} fen={fen} engine_skill={engine_skill} engine_persona={engine_persona} rng_seed={engine_rng_seed}")
     # Check for terminal state after engine move
     is_over, reason, winner = game.check_game_over()
     if is_over:
         end_payload = game.end_game(reason, winner)
         # Do NOT auto-save or reset here; return final state to client for user confirmation
-        return jsonify({"ok": True, "fen": game.get_fen(), "engine_reply": reply, "game_over": True, "reason": end_payload.get('reason'), "result": end_payload.get('result'), "pgn": end_payload.get('pgn')})
+        return _json_response({"ok": True, "fen": fen, "engine_reply": reply, "game_over": True, "reason": end_payload.get('reason'), "result": end_payload.get('result'), "pgn": end_payload.get('pgn')})
 
-    return jsonify({"ok": True, "fen": game.get_fen(), "engine_reply": reply, "game_over": False, "reason": None, "result": None, "pgn": None})
+    return _json_response({"ok": True, "fen": fen, "engine_reply": reply, "game_over": False, "reason": None, "result": None, "pgn": None})
 
 
 @api_bp.route("/api/resign", methods=["POST"])
 def api_resign():
-    data = request.get_json() or {}
+    game = _get_game()
+    data = _read_json()
     resigned = data.get("resigned_side")
     # Normalize
     if resigned not in ("white", "black"):
@@ -310,9 +542,9 @@ def api_resign():
         end_payload = game.end_game('resign', winner=winner, user_side=user_side, user_name=user_name, opponent_name=opponent_name)
         # Do not reset here; caller may inspect final board before reset
         resp = {"ok": True, "resign": True, "resigned_side": resigned, "winner": winner, "game_over": True, "reason": end_payload.get('reason'), "result": end_payload.get('result'), "pgn": end_payload.get('pgn')}
-        return jsonify(resp)
+        return _json_response(resp)
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return _json_response({"ok": False, "error": str(e)}, 500)
 
 
 def save_pgn_to_file(result='*', user_side=None, user_name='Player', opponent_name='Opponent', pgn_text=None):
@@ -320,46 +552,36 @@ def save_pgn_to_file(result='*', user_side=None, user_name='Player', opponent_na
 
     user_side: 'white' or 'black' or None. If provided, sets the White/Black headers accordingly.
     """
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    outdir = os.path.join(root, 'games')
-    os.makedirs(outdir, exist_ok=True)
+    game = _get_game()
+    outdir = _GAMES_DIR
     now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
     fname = f'game_{now}.pgn'
     path = os.path.join(outdir, fname)
 
     # If caller supplied a PGN string, write that; otherwise build from current board
     if pgn_text is None:
-        # Build PGN game
-        g = chess.pgn.Game()
-        g.headers['Event'] = 'Chess'
-        g.headers['Date'] = datetime.datetime.now().strftime('%Y.%m.%d')
-        # Prefer stored game result/termination when available (do not override)
-        result_to_use = getattr(game, 'result', None) or result
-        g.headers['Result'] = result_to_use
+        # Build PGN headers; movetext is generated straight from the move stack
+        headers = {
+            'Event': 'Chess',
+            'Date': datetime.datetime.now().strftime('%Y.%m.%d'),
+            # Prefer stored game result/termination when available (do not override)
+            'Result': getattr(game, 'result', None) or result,
+        }
         if getattr(game, 'end_reason', None):
-            g.headers['Termination'] = game.end_reason
+            headers['Termination'] = game.end_reason
 
         # Set player names if we know which side the user played
         if user_side == 'white':
-            g.headers['White'] = user_name
-            g.headers['Black'] = opponent_name
+            headers['White'] = user_name
+            headers['Black'] = opponent_name
         elif user_side == 'black':
-            g.headers['White'] = opponent_name
-            g.headers['Black'] = user_name
+            headers['White'] = opponent_name
+            headers['Black'] = user_name
         else:
-            g.headers['White'] = 'White'
-            g.headers['Black'] = 'Black'
+            headers['White'] = 'White'
+            headers['Black'] = 'Black'
 
-        node = g
-        try:
-            # Add moves from the board's move stack sequentially
-            for mv in game.board.move_stack:
-                node = node.add_variation(mv)
-        except Exception:
-            pass
-
-        exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
-        pgn_text = g.accept(exporter)
+        pgn_text = board_to_pgn(game.board, headers)
 
     with open(path, 'w', encoding='utf-8') as fh:
         fh.write(pgn_text or '')
@@ -371,27 +593,22 @@ def save_pgn_to_file(result='*', user_side=None, user_name='Player', opponent_na
 def api_sync_main_js():
     """Copy `static/main.js` to project root `main.js.txt` atomically and return status."""
     try:
-        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        static_path = os.path.join(root, 'static', 'main.js')
-        out_path = os.path.join(root, 'main.js.txt')
+        static_path = os.path.join(_ROOT, 'static', 'main.js')
+        out_path = os.path.join(_ROOT, 'main.js.txt')
         tmp_path = out_path + '.tmp'
 
-        # Read and write in binary to preserve exact file contents
-        with open(static_path, 'rb') as fh:
-            data = fh.read()
-
-        # Write to a temp file then replace to ensure atomicity
-        with open(tmp_path, 'wb') as fh:
-            fh.write(data)
+        # Byte-exact copy to a temp file (shutil uses os.sendfile on Linux, so the
+        # data never passes through Python), then replace to ensure atomicity
+        shutil.copyfile(static_path, tmp_path)
         os.replace(tmp_path, out_path)
-        return jsonify({"ok": True, "path": 'main.js.txt'})
+        return _json_response({"ok": True, "path": 'main.js.txt'})
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return _json_response({"ok": False, "error": str(e)}, 500)
 
 
 @api_bp.route("/api/save_pgn", methods=["POST"])
 def api_save_pgn():
-    data = request.get_json() or {}
+    data = _read_json()
     result = data.get('result') or '*'
     user_side = data.get('user_side')
     user_name = data.get('user_name') or 'Player'
@@ -399,9 +616,9 @@ def api_save_pgn():
     pgn_text = data.get('pgn_text')
     try:
         fname = save_pgn_to_file(result=result, user_side=user_side, user_name=user_name, opponent_name=opponent_name, pgn_text=pgn_text)
-        return jsonify({"ok": True, "pgn_file": fname})
+        return _json_response({"ok": True, "pgn_file": fname})
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return _json_response({"ok": False, "error": str(e)}, 500)
 
 
 # NOTE: `/api/ack_game_over` intentionally removed per v1 decision -
@@ -411,41 +628,29 @@ def api_save_pgn():
 @api_bp.route("/api/engine_move_debug", methods=["POST"])
 def api_engine_move_debug():
     """Diagnostic endpoint: call engine_move and return detailed debug info in the JSON response."""
-    data = request.get_json() or {}
-    try:
-        engine_time = float(data.get("engine_time", 0.1))
-    except Exception:
-        engine_time = 0.1
+    game = _get_game()
+    data = _read_json()
+    engine_time = _num(data, "engine_time", 0.1)
     engine_persona = data.get('engine_persona')
     try:
-        from app.engine_personas import is_persona_allowed
         if engine_persona and not is_persona_allowed(engine_persona):
-            return jsonify({"ok": False, "error": "unknown_persona"}), 400
+            return _err('unknown_persona', 400)
     except Exception:
         pass
-    try:
-        engine_skill = data.get("engine_skill")
-        engine_skill = int(engine_skill) if engine_skill is not None else None
-    except Exception:
-        engine_skill = None
-    engine_rng_seed = data.get('rng_seed') if 'rng_seed' in data else None
-    if engine_rng_seed is not None:
-        try:
-            engine_rng_seed = int(engine_rng_seed)
-        except Exception:
-            pass
+    engine_skill = _num(data, "engine_skill", None, int)
+    engine_rng_seed = _maybe_int(data.get('rng_seed'))
 
-    pre_fen = game.get_fen()
-    dbg = None
+    pre_fen = _cached_fen(game)
     err = None
     reply = None
     try:
         reply = game.engine_move(limit=engine_time, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=engine_rng_seed)
+        _invalidate_fen_cache(game)
     except Exception as e:
         err = str(e)
         err_tb = traceback.format_exc()
         # include traceback in response where reasonable
-        return jsonify({"ok": False, "error": err, "traceback": err_tb, "pre_fen": pre_fen}), 500
+        return _json_response({"ok": False, "error": err, "traceback": err_tb, "pre_fen": pre_fen}, 500)
 
     # FIX: if engine returned None but made a move, recover it from the board move stack
     if reply is None:
@@ -459,7 +664,7 @@ def api_engine_move_debug():
         except Exception:
             pass
 
-    post_fen = game.get_fen()
+    post_fen = _cached_fen(game)
     out = {"ok": True, "pre_fen": pre_fen, "post_fen": post_fen, "reply": reply, "engine_skill": engine_skill, "engine_persona": engine_persona}
     # If engine returned no move, try a one-off engine invocation to compare behavior
     if reply is None:
@@ -467,36 +672,40 @@ def api_engine_move_debug():
             one_off = None
             tmp_msg = None
             try:
-                eng = chess.engine.SimpleEngine.popen_uci(game.engine_path)
-                # try persona configure
-                try:
-                    from app.engine_personas import configure_persona, pick_move_with_multipv, set_rng_seed
-                    cfg = configure_persona(eng, engine_persona)
-                    # apply rng seed for the one-off sampling if provided
+                with _ENGINE_LOCK:
+                    eng = _get_engine(game.engine_path)
+                    # try persona configure
                     try:
-                        set_rng_seed(engine_rng_seed)
+                        cfg = configure_persona(eng, engine_persona)
+                        # apply rng seed for the one-off sampling if provided
+                        try:
+                            set_rng_seed(engine_rng_seed)
+                        except Exception:
+                            pass
+                        mv_res = pick_move_with_multipv(
+                            eng,
+                            game.board,
+                            depth=cfg.get('depth'),
+                            temperature=cfg.get('pick_temperature', 0.0),
+                            multipv=cfg.get('multipv', 10),
+                            mercy=cfg.get('mercy'),
+                            persona=engine_persona,
+                        )
+                        if mv_res:
+                            mv, sel_cp, best_cp, is_blunder = mv_res
+                        else:
+                            mv = None
+                        one_off = mv.uci() if mv is not None else None
                     except Exception:
-                        pass
-                    mv_res = pick_move_with_multipv(
-                        eng,
-                        game.board,
-                        depth=cfg.get('depth'),
-                        temperature=cfg.get('pick_temperature', 0.0),
-                        multipv=cfg.get('multipv', 10),
-                        mercy=cfg.get('mercy'),
-                        persona=engine_persona,
-                    )
-                    if mv_res:
-                        mv, sel_cp, best_cp, is_blunder = mv_res
-                    else:
-                        mv = None
-                    one_off = mv.uci() if mv is not None else None
-                except Exception:
-                    # fallback to timed play
-                    r = eng.play(game.board, chess.engine.Limit(time=engine_time))
-                    one_off = r.move.uci() if r and getattr(r,'move',None) else None
-                eng.quit()
+                        # fallback to timed play
+                        r = eng.play(game.board, chess.engine.Limit(time=engine_time))
+                        one_off = r.move.uci() if r and getattr(r,'move',None) else None
                 tmp_msg = 'one-off engine call succeeded'
+            except chess.engine.EngineTerminatedError as e:
+                # drop the dead process so the next debug call starts a fresh one
+                with _ENGINE_LOCK:
+                    _quit_engine()
+                tmp_msg = f'one-off engine call failed: {e}'
             except Exception as e:
                 tmp_msg = f'one-off engine call failed: {e}'
             out['one_off'] = one_off
@@ -504,7 +713,7 @@ def api_engine_move_debug():
         except Exception:
             out['one_off_msg'] = 'one-off investigation failed'
 
-    return jsonify(out)
+    return _json_response(out)
 
 
 @api_bp.route('/test_personas', methods=['GET'])
@@ -513,390 +722,442 @@ def test_personas_page():
     return render_template('test_personas.html')
 
 
+# Simulations run in worker processes so a long game does not hold a request
+# thread. Workers are spawned (not forked) because this process runs threads.
+_SIM_WORKERS = os.cpu_count() or 1
+_SIM_POOL = None
+_SIM_POOL_LOCK = threading.Lock()
+_SIM_JOBS = {}  # job id -> Future, removed once the result is collected
+_SIM_JOBS_LOCK = threading.Lock()
+_SIM_JOBS_MAX = 1000
+
+
+def _sim_pool():
+    global _SIM_POOL
+    # Workers read persona overrides from disk; write out a just-made edit first
+    flush_persona_overrides()
+    with _SIM_POOL_LOCK:
+        if _SIM_POOL is None:
+            _SIM_POOL = ProcessPoolExecutor(max_workers=_SIM_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_SIM_POOL.shutdown, wait=False, cancel_futures=True)
+        return _SIM_POOL
+
+
+def _sim_submit(fn, *args):
+    """Queue fn(*args) on the simulation pool; None if the pool is broken.
+
+    A worker that dies breaks its ProcessPoolExecutor for good, so a broken pool
+    is dropped here and the next call starts a fresh one.
+    """
+    global _SIM_POOL
+    pool = _sim_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        with _SIM_POOL_LOCK:
+            if _SIM_POOL is pool:
+                _SIM_POOL = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return None
+
+
 @api_bp.route('/api/simulate', methods=['POST'])
 @v1_guard
 def api_simulate():
-    """Run a headless simulation between two personas and return PGN + move list."""
-    data = request.get_json() or {}
+    """Queue a headless simulation between two personas; poll /api/simulate/status|result/<job_id>."""
+    data = _read_json()
     white_persona = data.get('white_persona')
     black_persona = data.get('black_persona')
-    try:
-        engine_time = float(data.get('engine_time', 0.1))
-    except Exception:
-        engine_time = 0.1
-    try:
-        max_moves = int(data.get('max_moves', 200))
-    except Exception:
-        max_moves = 200
+    engine_time = _num(data, 'engine_time', 0.1)
+    max_moves = _num(data, 'max_moves', 200, int)
     rng_seed = data.get('rng_seed') if 'rng_seed' in data else None
 
     # Validate personas if helper available
     try:
-        from app.engine_personas import is_persona_allowed
         if white_persona and not is_persona_allowed(white_persona):
-            return jsonify({'ok': False, 'error': 'unknown_persona_white'}), 400
+            return _err('unknown_persona_white', 400)
         if black_persona and not is_persona_allowed(black_persona):
-            return jsonify({'ok': False, 'error': 'unknown_persona_black'}), 400
+            return _err('unknown_persona_black', 400)
     except Exception:
         pass
 
-    # Run simulation on a fresh game instance
+    with _SIM_JOBS_LOCK:
+        if len(_SIM_JOBS) >= _SIM_JOBS_MAX:
+            # drop the oldest finished jobs nobody collected
+            for jid in [k for k, f in _SIM_JOBS.items() if f.done()][:len(_SIM_JOBS) - _SIM_JOBS_MAX + 1]:
+                del _SIM_JOBS[jid]
+        # the rest are still queued or running; don't let the queue grow without bound
+        if len(_SIM_JOBS) >= _SIM_JOBS_MAX:
+            return _err('too_many_jobs', 429)
+    job_id = uuid.uuid4().hex
+    fut = _sim_submit(run_simulation, white_persona, black_persona, engine_time, max_moves, rng_seed, _TESTS_DIR)
+    if fut is None:
+        return _err('simulation_unavailable', 503)
+    with _SIM_JOBS_LOCK:
+        _SIM_JOBS[job_id] = fut
+    return _json_response({'ok': True, 'job_id': job_id}, 202)
+
+
+def _sim_job_state(fut):
+    if fut.done():
+        return 'failed' if fut.exception() is not None else 'done'
+    return 'running' if fut.running() else 'queued'
+
+
+@api_bp.route('/api/simulate/status/<job_id>', methods=['GET'])
+@v1_guard
+def api_simulate_status(job_id):
+    with _SIM_JOBS_LOCK:
+        fut = _SIM_JOBS.get(job_id)
+    if fut is None:
+        return _err('unknown_job', 404)
+    return _json_response({'ok': True, 'job_id': job_id, 'state': _sim_job_state(fut)})
+
+
+@api_bp.route('/api/simulate/result/<job_id>', methods=['GET'])
+@v1_guard
+def api_simulate_result(job_id):
+    """Return the finished simulation payload (same shape the old synchronous endpoint had)."""
+    with _SIM_JOBS_LOCK:
+        fut = _SIM_JOBS.get(job_id)
+        if fut is not None and fut.done():
+            del _SIM_JOBS[job_id]
+    if fut is None:
+        return _err('unknown_job', 404)
+    if not fut.done():
+        return _json_response({'ok': True, 'job_id': job_id, 'state': _sim_job_state(fut)}, 202)
     try:
-        from app.chess_core import ChessGame
-        sim = ChessGame()
+        out = fut.result()
     except Exception as e:
-        return jsonify({'ok': False, 'error': f'failed_to_create_game: {e}'}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
+    return _json_response(out, 200 if out.get('ok') else 500)
 
-    move_list = []
-    reason = 'max_moves_reached'
-    for i in range(max_moves):
-        if sim.board.is_game_over():
-            reason = 'game_over'
-            break
-        persona = white_persona if sim.board.turn == chess.WHITE else black_persona
-        seed = None
-        if rng_seed is not None:
-            try:
-                seed = int(rng_seed) + i
-            except Exception:
-                seed = rng_seed
-        # Use internal persona default engine time when a persona is provided
-        mv_time = engine_time
-        if persona:
-            try:
-                mv_time = float(PERSONA_DEFAULT_ENGINE_TIME)
-            except Exception:
-                pass
-        mv = sim.engine_move(limit=mv_time, engine_persona=persona, rng_seed=seed)
-        if not mv:
-            reason = 'engine_failed'
-            break
-        move_list.append(mv)
 
-    # Build PGN
-    try:
-        g = chess.pgn.Game()
-        g.headers['Event'] = 'Persona Simulation'
-        # Record selected personas as the player names in the PGN
-        g.headers['White'] = white_persona or 'White'
-        g.headers['Black'] = black_persona or 'Black'
-        g.headers['Result'] = sim.board.result() if sim.board.is_game_over() else '*'
-        node = g
-        for mv in sim.board.move_stack:
-            node = node.add_variation(mv)
-        exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
-        pgn_text = g.accept(exporter)
-    except Exception:
-        pgn_text = None
+# Serialized persona responses, rebuilt only after an endpoint changes overrides.
+# _PERSONAS_VERSION is bumped on every change; a response computed under an older
+# version is not stored.
+_PERSONAS_VERSION = 0
+_PERSONAS_CACHE = {}  # None -> list payload bytes, name -> single persona bytes
+_PERSONAS_LOCK = threading.Lock()
 
-    # Auto-save PGN to games/tests/ with a timestamped filename
-    saved_fname = None
-    try:
-        if pgn_text:
-            root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            outdir = os.path.join(root, 'games', 'tests')
-            os.makedirs(outdir, exist_ok=True)
-            now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            wp = (white_persona or 'white')
-            bp = (black_persona or 'black')
-            safe_wp = str(wp).replace(' ', '_')
-            safe_bp = str(bp).replace(' ', '_')
-            fname = f'sim_{safe_wp}_vs_{safe_bp}_{now}.pgn'
-            path = os.path.join(outdir, fname)
-            with open(path, 'w', encoding='utf-8') as fh:
-                fh.write(pgn_text)
-            saved_fname = fname
-    except Exception:
-        saved_fname = None
 
-    return jsonify({'ok': True, 'moves': move_list, 'pgn': pgn_text, 'result': g.headers.get('Result'), 'reason': reason, 'saved_file': saved_fname})
+def _invalidate_personas_cache():
+    global _PERSONAS_VERSION
+    with _PERSONAS_LOCK:
+        _PERSONAS_VERSION += 1
+        _PERSONAS_CACHE.clear()
+
+
+def _cached_personas_body(key, build):
+    with _PERSONAS_LOCK:
+        body = _PERSONAS_CACHE.get(key)
+        version = _PERSONAS_VERSION
+    if body is None:
+        body = orjson.dumps(build())
+        with _PERSONAS_LOCK:
+            if version == _PERSONAS_VERSION:
+                _PERSONAS_CACHE[key] = body
+    return current_app.response_class(body, mimetype='application/json')
 
 
 @api_bp.route('/api/personas', methods=['GET'])
 @v1_guard
 def api_personas_list():
     try:
-        from app.engine_personas import list_personas, get_persona_config
-        data = {}
-        for p in list_personas():
-            data[p] = get_persona_config(p)
-        return jsonify({'ok': True, 'personas': data})
+        def build():
+            data = {}
+            for p in list_personas():
+                data[p] = get_persona_config(p)
+            return {'ok': True, 'personas': data}
+        return _cached_personas_body(None, build)
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/persona/<name>', methods=['GET', 'POST'])
 @v1_guard
 def api_persona(name):
     try:
-        from app.engine_personas import get_persona_config, set_persona_override, validate_persona_override
         if request.method == 'GET':
+            if is_persona_allowed(name):
+                return _cached_personas_body(name, lambda: {'ok': True, 'persona': name, 'config': get_persona_config(name)})
             cfg = get_persona_config(name)
             if cfg is None:
-                return jsonify({'ok': False, 'error': 'unknown_persona'}), 400
-            return jsonify({'ok': True, 'persona': name, 'config': cfg})
+                return _err('unknown_persona', 400)
+            return _json_response({'ok': True, 'persona': name, 'config': cfg})
         else:
-            data = request.get_json() or {}
+            data = _read_json()
             # accept partial overrides but validate first
             okv, err = validate_persona_override(name, data)
             if not okv:
-                return jsonify({'ok': False, 'error': 'invalid_override', 'message': err}), 400
+                return _json_response({'ok': False, 'error': 'invalid_override', 'message': err}, 400)
             ok = set_persona_override(name, data)
+            _invalidate_personas_cache()
             if not ok:
-                return jsonify({'ok': False, 'error': 'failed_to_set'}), 400
-            return jsonify({'ok': True})
+                return _err('failed_to_set', 400)
+            return _json_response({'ok': True})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/persona/<name>/reset', methods=['POST'])
 @v1_guard
 def api_persona_reset(name):
     try:
-        from app.engine_personas import reset_persona
         ok = reset_persona(name)
+        _invalidate_personas_cache()
         if not ok:
-            return jsonify({'ok': False, 'error': 'unknown_persona'}), 400
-        return jsonify({'ok': True})
+            return _err('unknown_persona', 400)
+        return _json_response({'ok': True})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/personas/reset_all', methods=['POST'])
 @v1_guard
 def api_personas_reset_all():
     try:
-        from app.engine_personas import reset_all_persona_overrides
         ok = reset_all_persona_overrides()
+        _invalidate_personas_cache()
         if not ok:
-            return jsonify({'ok': False, 'error': 'failed_to_reset'}), 500
-        return jsonify({'ok': True})
+            return _err('failed_to_reset', 500)
+        return _json_response({'ok': True})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/personas/export', methods=['GET'])
 @v1_guard
 def api_personas_export():
     try:
-        from app.engine_personas import export_persona_overrides
         data = export_persona_overrides()
-        return jsonify({'ok': True, 'overrides': data})
+        return _json_response({'ok': True, 'overrides': data})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/personas/import', methods=['POST'])
 @v1_guard
 def api_personas_import():
-    data = request.get_json() or {}
+    data = _read_json()
     # Accept either {'overrides': {...}} or the raw dict
     payload = data.get('overrides') if isinstance(data.get('overrides'), dict) else data
     try:
-        from app.engine_personas import import_persona_overrides, validate_persona_override
         # validate incoming payload before attempting to import
         if not isinstance(payload, dict):
-            return jsonify({'ok': False, 'error': 'invalid_payload'}), 400
+            return _err('invalid_payload', 400)
         for k, v in payload.items():
             if not isinstance(v, dict):
-                return jsonify({'ok': False, 'error': 'invalid_entry', 'which': k}), 400
+                return _json_response({'ok': False, 'error': 'invalid_entry', 'which': k}, 400)
             okv, err = validate_persona_override(k, v)
             if not okv:
-                return jsonify({'ok': False, 'error': 'invalid_entry_schema', 'which': k, 'message': err}), 400
-        ok = import_persona_overrides(payload)
+                return _json_response({'ok': False, 'error': 'invalid_entry_schema', 'which': k, 'message': err}, 400)
+        # entries were validated above; don't walk them a second time
+        ok = import_persona_overrides(payload, validate=False)
+        _invalidate_personas_cache()
         if not ok:
-            return jsonify({'ok': False, 'error': 'save_failed'}), 500
-        return jsonify({'ok': True})
+            return _err('save_failed', 500)
+        return _json_response({'ok': True})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
+
+
+def _revalidated(resp, etag):
+    """Tag a response for conditional GETs: clients may keep it but must revalidate."""
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+# Serialized /api/engine_info payload and its ETag, keyed by the STOCKFISH_PATH
+# override it was built under (the only input to engine detection that can change
+# at runtime).
+_ENGINE_INFO = (None, None, None)
 
 
 @api_bp.route('/api/engine_info', methods=['GET'])
 def api_engine_info():
-    try:
-        # Provide detected engine path and some defaults
-        from app.chess_core import ChessGame
-        cg = ChessGame()
-        engine_ok = bool(cg.engine_path)
-        data = {'engine_path': cg.engine_path or None, 'engine_detected': engine_ok, 'default_engine_time': 0.05, 'multipv_cap': 16}
-        return jsonify({'ok': True, 'engine': data})
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    global _ENGINE_INFO
+    override = os.environ.get('STOCKFISH_PATH')
+    key, body, etag = _ENGINE_INFO
+    if body is None or key != override:
+        try:
+            # Provide detected engine path and some defaults
+            cg = ChessGame(shared_state=False)
+            engine_ok = bool(cg.engine_path)
+            data = {'engine_path': cg.engine_path or None, 'engine_detected': engine_ok, 'default_engine_time': 0.05, 'multipv_cap': 16}
+            body = orjson.dumps({'ok': True, 'engine': data})
+        except Exception as e:
+            return _json_response({'ok': False, 'error': str(e)}, 500)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _ENGINE_INFO = (override, body, etag)
+    if etag in request.if_none_match:
+        return _revalidated(current_app.response_class(status=304), etag)
+    return _revalidated(current_app.response_class(body, mimetype='application/json'), etag)
+
+
+# Most games one /api/simulate_batch call plays, and how many of them are queued on
+# the pool ahead of the stream (topped up as lines are sent).
+_BATCH_MAX_GAMES = 500
+_BATCH_WINDOW = 2 * _SIM_WORKERS
 
 
 @api_bp.route('/api/simulate_batch', methods=['POST'])
 @v1_guard
 def api_simulate_batch():
     """Run multiple persona-vs-persona games server-side and save PGNs + CSV summary."""
-    data = request.get_json() or {}
+    data = _read_json()
     white_persona = data.get('white_persona')
     black_persona = data.get('black_persona')
-    try:
-        engine_time = float(data.get('engine_time', 0.05))
-    except Exception:
-        engine_time = 0.05
-    try:
-        count = int(data.get('count', 1))
-    except Exception:
-        count = 1
-    try:
-        max_moves = int(data.get('max_moves', 400))
-    except Exception:
-        max_moves = 400
+    engine_time = _num(data, 'engine_time', 0.05)
+    count = min(_num(data, 'count', 1, int), _BATCH_MAX_GAMES)
+    max_moves = _num(data, 'max_moves', 400, int)
     seed = data.get('seed') if 'seed' in data else None
 
     # Validation
     try:
-        from app.engine_personas import is_persona_allowed
         if white_persona and not is_persona_allowed(white_persona):
-            return jsonify({'ok': False, 'error': 'unknown_persona_white'}), 400
+            return _err('unknown_persona_white', 400)
         if black_persona and not is_persona_allowed(black_persona):
-            return jsonify({'ok': False, 'error': 'unknown_persona_black'}), 400
+            return _err('unknown_persona_black', 400)
     except Exception:
         pass
 
-    # Prepare output dir
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    outdir = os.path.join(root, 'games', 'tests')
-    os.makedirs(outdir, exist_ok=True)
-
-    rows = []
-    saved = []
-    pgn_texts = []
-    for i in range(count):
+    # Games are independent (each worker starts its own engines), so play them
+    # side by side on the simulation pool and collect results in game order.
+    # Only _BATCH_WINDOW games are queued at a time, so a client that goes away
+    # leaves little work behind. All files of a batch share one timestamp; games
+    # are told apart by number.
+    batch_now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    safe_wp = str(white_persona or 'white').replace(' ', '_')
+    safe_bp = str(black_persona or 'black').replace(' ', '_')
+    unavailable = orjson.dumps({'ok': False, 'error': 'simulation_unavailable'}) + b'\n'
+    futs = {}  # game index -> Future of the games queued so far
+
+    def submit(i):
+        fut = _sim_submit(run_batch_game, i, white_persona, black_persona, engine_time, max_moves, seed, _TESTS_DIR,
+                          f'sim_{safe_wp}_vs_{safe_bp}_{batch_now}_{i+1}.pgn')
+        if fut is not None:
+            futs[i] = fut
+        return fut is not None
+
+    for i in range(min(count, _BATCH_WINDOW)):
+        if not submit(i):
+            # broken pool (now replaced): report it the way a failed batch is reported
+            for f in futs.values():
+                f.cancel()
+            return current_app.response_class(unavailable, mimetype='application/x-ndjson')
+
+    def stream():
+        # One NDJSON line per game as it completes (in game order), then a summary
+        # line shaped like the old single-object response. PGNs and CSV rows go
+        # straight to disk, so nothing accumulates across the batch.
+        saved = []
+        csv_name = f'summary_{batch_now}.csv'
+        batch_name = f"batch_{str(white_persona).replace(' ', '_')}_vs_{str(black_persona).replace(' ', '_')}_{batch_now}.pgn"
+        cf = bf = None
         try:
-            from app.chess_core import ChessGame
-            sim = ChessGame()
-        except Exception as e:
-            return jsonify({'ok': False, 'error': f'failed_to_create_game: {e}'}), 500
-
-        reason = 'max_moves_reached'
-        seed_used = None
-        for mv_i in range(max_moves):
-            if sim.board.is_game_over():
-                reason = 'game_over'
-                break
-            persona = white_persona if sim.board.turn == chess.WHITE else black_persona
-            mv_seed = None
-            if seed is not None:
-                try:
-                    mv_seed = int(seed) + mv_i
-                except Exception:
-                    mv_seed = seed
-            if seed_used is None:
-                seed_used = mv_seed
-            mv_time = engine_time
-            if persona:
+            try:
+                cf = open(os.path.join(_TESTS_DIR, csv_name), 'w', newline='', encoding='utf-8')
+                w = csv.DictWriter(cf, fieldnames=['file', 'white', 'black', 'result', 'moves', 'seed', 'reason'])
+                w.writeheader()
+            except Exception:
+                cf = None
+            for i in range(count):
+                fut = futs.pop(i)
+                # keep the window full while this game finishes
+                if i + _BATCH_WINDOW < count and not submit(i + _BATCH_WINDOW):
+                    yield unavailable
+                    return
                 try:
-                    mv_time = float(PERSONA_DEFAULT_ENGINE_TIME)
-                except Exception:
-                    pass
-            mv = sim.engine_move(limit=mv_time, engine_persona=persona, rng_seed=mv_seed)
-            if not mv:
-                reason = 'engine_failed'
-                break
-        result = sim.board.result() if sim.board.is_game_over() else '*'
-        # save PGN
-        try:
-            g = chess.pgn.Game()
-            g.headers['Event'] = 'Persona Simulation'
-            g.headers['White'] = white_persona or 'White'
-            g.headers['Black'] = black_persona or 'Black'
-            # Add useful metadata headers for batch analysis
-            g.headers['WhitePersona'] = white_persona or ''
-            g.headers['BlackPersona'] = black_persona or ''
-            g.headers['Seed'] = str(seed_used) if seed_used is not None else ''
-            g.headers['GameNumber'] = str(i+1)
-            g.headers['EngineTime'] = str(engine_time)
-            g.headers['Termination'] = reason or ''
-            g.headers['Result'] = result
-            node = g
-            for mv in sim.board.move_stack:
-                node = node.add_variation(mv)
-            exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
-            pgn_text = g.accept(exporter)
-            now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_wp = str(white_persona or 'white').replace(' ', '_')
-            safe_bp = str(black_persona or 'black').replace(' ', '_')
-            fname = f'sim_{safe_wp}_vs_{safe_bp}_{now}_{i+1}.pgn'
-            path = os.path.join(outdir, fname)
-            with open(path, 'w', encoding='utf-8') as fh:
-                fh.write(pgn_text)
-            saved.append(fname)
-            pgn_texts.append(pgn_text)
-            rows.append({'file': fname, 'white': white_persona, 'black': black_persona, 'result': result, 'moves': len(sim.board.move_stack), 'seed': seed_used, 'reason': reason})
-        except Exception:
-            pass
-
-    # Write CSV
-    csv_path = os.path.join(outdir, f'summary_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
-    try:
-        with open(csv_path, 'w', newline='', encoding='utf-8') as cf:
-            w = csv.DictWriter(cf, fieldnames=['file', 'white', 'black', 'result', 'moves', 'seed', 'reason'])
-            w.writeheader()
-            for r in rows:
-                w.writerow(r)
-    except Exception:
-        csv_path = None
-
-    # If we have multiple PGNs, write a combined PGN file
-    combined_name = None
-    try:
-        if pgn_texts:
-            now2 = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_wp = str(white_persona).replace(' ', '_')
-            safe_bp = str(black_persona).replace(' ', '_')
-            combined_name = f'batch_{safe_wp}_vs_{safe_bp}_{now2}.pgn'
-            combined_path = os.path.join(outdir, combined_name)
-            with open(combined_path, 'w', encoding='utf-8') as cf:
-                for pt in pgn_texts:
-                    cf.write(pt)
-                    cf.write('\n\n')
-    except Exception:
-        combined_name = None
-
-    return jsonify({'ok': True, 'count': len(saved), 'files': saved, 'csv': os.path.basename(csv_path) if csv_path else None, 'batch_pgn': combined_name})
+                    res = fut.result()
+                except Exception as e:
+                    # a bug in one game (or a dead worker) is reported on its line
+                    res = {'ok': True, 'file': None, 'error': f'game_failed: {e}'}
+                if not res.get('ok'):
+                    yield orjson.dumps({'ok': False, 'error': res.get('error')}) + b'\n'
+                    return
+                fname = res.get('file')
+                if not fname:
+                    yield orjson.dumps({'i': i, 'file': None, 'error': res.get('error')}) + b'\n'
+                    continue
+                saved.append(fname)
+                row = res['row']
+                if cf is not None:
+                    try:
+                        w.writerow(row)
+                        cf.flush()
+                    except Exception:
+                        cf.close()
+                        cf = None
+                if batch_name:
+                    try:
+                        if bf is None:
+                            bf = open(os.path.join(_TESTS_DIR, batch_name), 'w', encoding='utf-8')
+                        bf.write(res['pgn'] + '\n\n')
+                    except Exception:
+                        batch_name = None
+                yield orjson.dumps({'i': i, 'file': fname, 'result': row['result'], 'reason': row['reason']}) + b'\n'
+            yield orjson.dumps({'ok': True, 'count': len(saved), 'files': saved, 'csv': csv_name if cf is not None else None, 'batch_pgn': batch_name if bf is not None else None}) + b'\n'
+        finally:
+            # also reached when the client goes away mid-batch
+            for fut in futs.values():
+                fut.cancel()
+            for fh in (cf, bf):
+                if fh is not None:
+                    fh.close()
+
+    return current_app.response_class(stream(), mimetype='application/x-ndjson')
+
+
+def _tail_lines(path, n, window=65536):
+    """Last `n` lines of a text file, reading backwards from the end in growing
+    windows instead of loading the whole file."""
+    with open(path, 'rb') as fh:
+        size = fh.seek(0, os.SEEK_END)
+        while True:
+            start = max(0, size - window)
+            fh.seek(start)
+            lines = fh.read(size - start).decode('utf-8', 'ignore').splitlines()
+            # the window's first line may be cut mid-way, so it only counts at offset 0
+            if start == 0 or len(lines) > n:
+                return lines[-n:]
+            window *= 2
 
 
 @api_bp.route('/api/open_engine_debug', methods=['GET'])
 def api_open_engine_debug():
     try:
-        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        dbg = os.path.join(root, 'engine_debug.log')
-        if not os.path.exists(dbg):
-            return jsonify({'ok': True, 'output': []})
-        with open(dbg, 'r', encoding='utf-8', errors='ignore') as fh:
-            lines = fh.read().splitlines()
-        tail = lines[-50:]
-        return jsonify({'ok': True, 'output': tail})
+        if not os.path.exists(_DBG_PATH):
+            return _json_response({'ok': True, 'output': []})
+        tail = _tail_lines(_DBG_PATH, 50)
+        return _json_response({'ok': True, 'output': tail})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/open_pgn_notepad', methods=['POST'])
 @v1_guard
 def api_open_pgn_notepad():
-    data = request.get_json() or {}
+    data = _read_json()
     fname = data.get('filename')
     if not fname:
-        return jsonify({'ok': False, 'error': 'missing_filename'}), 400
+        return _err('missing_filename', 400)
     try:
-        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        path = os.path.join(root, 'games', 'tests', fname)
+        path = os.path.join(_TESTS_DIR, fname)
         if not os.path.exists(path):
-            return jsonify({'ok': False, 'error': 'file_not_found'}), 404
+            return _err('file_not_found', 404)
         # Only attempt to open on Windows using notepad
         if os.name == 'nt':
             try:
-                import subprocess
                 subprocess.Popen(['notepad.exe', path])
-                return jsonify({'ok': True})
+                return _json_response({'ok': True})
             except Exception as e:
-                return jsonify({'ok': False, 'error': str(e)}), 500
+                return _json_response({'ok': False, 'error': str(e)}, 500)
         else:
-            return jsonify({'ok': False, 'error': 'not_supported_on_os'}), 400
+            return _err('not_supported_on_os', 400)
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 # Dev-only helper: inspect and tweak in-memory bot presets during development.
@@ -906,7 +1167,7 @@ def api_dev_presets():
     # Disable when v1 mode is active and not in debug
     try:
         if V1_MODE and not current_app.debug:
-            return jsonify({'ok': False, 'error': 'disabled_in_v1'}), 404
+            return _err('disabled_in_v1', 404)
     except Exception:
         pass
 
@@ -915,19 +1176,19 @@ def api_dev_presets():
         try:
             # shallow copy to avoid accidental mutation
             data = {k: dict(v) for k, v in BOT_PRESETS.items()}
-            return jsonify({'ok': True, 'presets': data})
+            return _json_response({'ok': True, 'presets': data})
         except Exception as e:
-            return jsonify({'ok': False, 'error': str(e)}), 500
+            return _json_response({'ok': False, 'error': str(e)}, 500)
 
     # POST: update an existing preset in-memory for this dev session
-    data = request.get_json() or {}
+    data = _read_json()
     name = data.get('name')
     preset = data.get('preset')
     if not name or not isinstance(preset, dict):
-        return jsonify({'ok': False, 'error': 'missing_name_or_preset'}), 400
+        return _err('missing_name_or_preset', 400)
     key = str(name).lower()
     if key not in BOT_PRESETS:
-        return jsonify({'ok': False, 'error': 'unknown_preset'}), 400
+        return _err('unknown_preset', 400)
     try:
         # Validate fields we accept: display_name, engine_persona, engine_skill, engine_time
         upd = {}
@@ -946,22 +1207,29 @@ def api_dev_presets():
                 upd['engine_time'] = BOT_PRESETS[key].get('engine_time')
 
         BOT_PRESETS[key].update(upd)
-        return jsonify({'ok': True, 'preset': BOT_PRESETS[key]})
+        _refresh_preset_time_cache()
+        return _json_response({'ok': True, 'preset': BOT_PRESETS[key]})
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 @api_bp.route('/api/dev/game_status', methods=['GET'])
 def api_dev_game_status():
+    game = _get_game()
     # Dev-only: expose simple lifecycle fields. Disabled when v1 mode active and not debug.
     try:
         if V1_MODE and not current_app.debug:
-            return jsonify({'ok': False, 'error': 'disabled_in_v1'}), 404
+            return _err('disabled_in_v1', 404)
     except Exception:
         pass
     try:
-        return jsonify({'ok': True, 'status': getattr(game, 'status', None), 'end_reason': getattr(game, 'end_reason', None), 'result': getattr(game, 'result', None)})
+        fields = (getattr(game, 'status', None), getattr(game, 'end_reason', None), getattr(game, 'result', None))
+        # polled between moves, when nothing has changed: answer 304 without a body
+        etag = hashlib.blake2b(repr(fields).encode(), digest_size=8).hexdigest()
+        if etag in request.if_none_match:
+            return _revalidated(current_app.response_class(status=304), etag)
+        return _revalidated(_json_response({'ok': True, 'status': fields[0], 'end_reason': fields[1], 'result': fields[2]}), etag)
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/api/download_pgn', methods=['GET'])
@@ -969,19 +1237,27 @@ def api_download_pgn():
     """Download a file from games/tests by filename (safe, no path traversal)."""
     fname = request.args.get('filename')
     if not fname:
-        return jsonify({'ok': False, 'error': 'missing_filename'}), 400
+        return _err('missing_filename', 400)
     safe = os.path.basename(fname)
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     # allow files from games/tests and games
-    candidates = [os.path.join(root, 'games', 'tests', safe), os.path.join(root, 'games', safe)]
+    candidates = [os.path.join(_TESTS_DIR, safe), os.path.join(_GAMES_DIR, safe)]
     found = None
     for p in candidates:
         if os.path.exists(p):
             found = p
             break
     if not found:
-        return jsonify({'ok': False, 'error': 'file_not_found'}), 404
+        return _err('file_not_found', 404)
+    if _ACCEL_REDIRECT:
+        # Let the reverse proxy stream the file from an internal location mapped to games/
+        rel = os.path.relpath(found, _GAMES_DIR).replace(os.sep, '/')
+        resp = current_app.response_class(status=200)
+        resp.headers['X-Accel-Redirect'] = '/protected-games/' + urllib.parse.quote(rel)
+        resp.headers.set('Content-Disposition', 'attachment', filename=safe)
+        # the proxy fills in the real type from the file it serves
+        del resp.headers['Content-Type']
+        return resp
     try:
         return send_file(found, as_attachment=True, download_name=safe)
     except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        return _json_response({'ok': False, 'error': str(e)}, 500)
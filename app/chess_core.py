@@ -1,10 +1,249 @@
+import asyncio
+import atexit
 import os
 import platform
+import struct
+import time
 import chess
 import chess.engine
-import chess.pgn
 import datetime
-from app.engine_personas import configure_persona, pick_move_with_multipv, set_rng_seed
+import functools
+import mmap
+import threading
+import types
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.engine_personas import configure_persona, overrides_version, pick_move_with_multipv, set_rng_seed
+
+
+# Project root, resolved once at import
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# =======================================================
+# SMART SWITCH: Detect OS and set default Engine/State paths
+# =======================================================
+if platform.system() == "Windows":
+    # --- WINDOWS CONFIG (local machine) ---
+    # Use project-relative path to the bundled Windows Stockfish binary
+    _DEFAULT_ENGINE_PATH = os.path.join(_ROOT, 'stockfish', 'stockfish-windows-x86-64-avx2.exe')
+
+    # Windows uses a local file for the game state
+    _DEFAULT_STATE_FILE_PATH = "game_state.mmap"
+else:
+    # --- LINUX CONFIG (server) ---
+    _DEFAULT_ENGINE_PATH = os.path.join(_ROOT, 'stockfish', 'stockfish-ubuntu-x86-64')
+
+    # Linux uses the RAM Disk (fast!) for game state
+    _DEFAULT_STATE_FILE_PATH = "/dev/shm/game_state.mmap"
+
+
+def _prefetch_engine_binary(path):
+    """Ask the OS to start reading the engine binary into the page cache, so the
+    first popen_uci after boot doesn't exec it from a cold disk. Linux only."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_prefetch_engine_binary(os.environ.get("STOCKFISH_PATH") or _DEFAULT_ENGINE_PATH)
+
+
+# Every engine started by popen_engine; those still open at exit are quit then.
+_OPEN_ENGINES = weakref.WeakSet()
+_OPEN_ENGINES_LOCK = threading.Lock()
+
+
+def popen_engine(path, timeout=10.0):
+    """Start a UCI engine, like chess.engine.SimpleEngine.popen_uci.
+
+    SimpleEngine.popen_uci runs the engine's event loop on a non-daemon thread,
+    which interpreter shutdown joins before any atexit hook could quit it, so an
+    engine left open would hang the exit. Here the loop runs on a daemon thread
+    and the atexit hook quits every engine still open.
+    """
+    future = Future()
+
+    async def background():
+        transport, protocol = await chess.engine.UciProtocol.popen(path)
+        eng = chess.engine.SimpleEngine(transport, protocol, timeout=timeout)
+        try:
+            await asyncio.wait_for(protocol.initialize(), timeout)
+            future.set_result(eng)
+            eng.returncode.set_result(await protocol.returncode)
+        finally:
+            eng.close()
+        await eng.shutdown_event.wait()
+
+    def run():
+        try:
+            asyncio.run(background())
+            future.cancel()
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+
+    threading.Thread(target=run, name=f'chess-engine-io ({path})', daemon=True).start()
+    eng = future.result()
+    with _OPEN_ENGINES_LOCK:
+        _OPEN_ENGINES.add(eng)
+    return eng
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Games holding a persistent engine -> when they last used it. Every session's
+# game gets its own engine, so they are capped: past _MAX_LIVE_ENGINES, starting
+# one releases the least recently used other game's engine, and engines idle for
+# _ENGINE_IDLE_SECS are released by a background reaper. A released game starts
+# a fresh engine on its next search.
+_MAX_LIVE_ENGINES = max(1, _env_int("SF_MAX_ENGINES", max(2, os.cpu_count() or 1)))
+_ENGINE_IDLE_SECS = max(1, _env_int("SF_ENGINE_IDLE_SECS", 120))
+_LIVE_GAMES = weakref.WeakKeyDictionary()
+_LIVE_LOCK = threading.Lock()
+_REAPER_STARTED = False
+
+
+def _engine_used(game, started=False):
+    """Record that `game` just used its engine; returns the games whose engines
+    must go to make room when it was `started`."""
+    global _REAPER_STARTED
+    with _LIVE_LOCK:
+        _LIVE_GAMES[game] = time.monotonic()
+        if not started:
+            return []
+        if not _REAPER_STARTED:
+            _REAPER_STARTED = True
+            threading.Thread(target=_reap_idle_engines, name='chess-engine-reaper', daemon=True).start()
+        excess = len(_LIVE_GAMES) - _MAX_LIVE_ENGINES
+        if excess <= 0:
+            return []
+        victims = sorted((t, id(g), g) for g, t in _LIVE_GAMES.items() if g is not game)[:excess]
+        for _, _, g in victims:
+            del _LIVE_GAMES[g]
+    return [g for _, _, g in victims]
+
+
+def _reap_idle_engines():
+    while True:
+        time.sleep(min(30, _ENGINE_IDLE_SECS))
+        cutoff = time.monotonic() - _ENGINE_IDLE_SECS
+        with _LIVE_LOCK:
+            idle = [g for g, t in _LIVE_GAMES.items() if t < cutoff]
+            for g in idle:
+                del _LIVE_GAMES[g]
+        for g in idle:
+            g.release_engine()
+
+
+@atexit.register
+def _quit_open_engines():
+    with _OPEN_ENGINES_LOCK:
+        engines = list(_OPEN_ENGINES)
+    for eng in engines:
+        try:
+            eng.quit()
+        except Exception:
+            pass
+
+
+# Search depth of the analysis started right after the user's move when its result
+# cannot be reused (persona replies); it still leaves the engine hash warm.
+_PREFETCH_DEPTH = 8
+
+# Per-game LRU of analyze_position results: FEN -> (search time, result)
+_ANALYSIS_CACHE_MAX = 256
+
+# Options every game engine starts with; skill and persona options are applied on
+# top and reset back to these. Each session's game has its own engine (up to
+# _MAX_LIVE_ENGINES of them), so the default is Stockfish's own 1 thread / 16 MB
+# hash; SF_THREADS and SF_HASH_MB raise them per engine on hosts with room.
+# Ponder is left alone: python-chess manages it per search.
+_ENGINE_BASE_OPTIONS = {
+    "Threads": max(1, _env_int("SF_THREADS", 1)),
+    "Hash": max(1, _env_int("SF_HASH_MB", 16)),
+    "Move Overhead": 20,
+}
+
+# One engine started ahead of need, (engine path, engine), handed to the next game
+# that needs one so its first move skips the spawn + UCI handshake.
+_SPARE_ENGINE = None
+_SPARE_STARTING = False
+_SPARE_LOCK = threading.Lock()
+
+
+def prewarm_engine(engine_path=None):
+    """Start a spare engine in the background (no-op if one is ready or starting)."""
+    global _SPARE_STARTING
+    path = engine_path or os.environ.get("STOCKFISH_PATH") or _DEFAULT_ENGINE_PATH
+    with _SPARE_LOCK:
+        if _SPARE_STARTING or _SPARE_ENGINE is not None:
+            return
+        _SPARE_STARTING = True
+    threading.Thread(target=_start_spare_engine, args=(path,), name='chess-engine-prewarm', daemon=True).start()
+
+
+def _configure_base_options(eng):
+    # One at a time: builds without an option (or rejecting its value) keep the rest
+    for name, value in _ENGINE_BASE_OPTIONS.items():
+        try:
+            eng.configure({name: value})
+        except Exception:
+            pass
+
+
+def _start_spare_engine(path):
+    global _SPARE_ENGINE, _SPARE_STARTING
+    try:
+        eng = popen_engine(path)
+        _configure_base_options(eng)
+    except Exception:
+        eng = None
+    with _SPARE_LOCK:
+        _SPARE_STARTING = False
+        if eng is not None:
+            _SPARE_ENGINE = (path, eng)
+
+
+def _take_spare_engine(path):
+    global _SPARE_ENGINE
+    with _SPARE_LOCK:
+        spare = _SPARE_ENGINE
+        if spare is None or spare[0] != path:
+            return None
+        _SPARE_ENGINE = None
+    # Have the next one ready for the next game
+    prewarm_engine(path)
+    return spare[1]
+
+
+def _restore_engine_defaults(eng):
+    """Put every option changed on `eng` (skill, persona UCI options) back to its
+    default, or to its `_ENGINE_BASE_OPTIONS` value."""
+    changed = {}
+    for name, value in eng.protocol.config.items():
+        opt = eng.options.get(name)
+        if opt is None or opt.is_managed() or opt.type == 'button':
+            continue
+        target = _ENGINE_BASE_OPTIONS.get(name, opt.default)
+        if value != target:
+            changed[name] = target
+    if changed:
+        eng.configure(changed)
 
 
 # Canonical bot presets used by the UI (5 opponents). Keys are normalized to
@@ -16,8 +255,9 @@ from app.engine_personas import configure_persona, pick_move_with_multipv, set_r
 #
 # Note: keep presets deterministic except where the persona config intentionally
 # adds sampling/temperature. This table is internal and mirrors persona names
-# defined in `app/engine_personas.py`.
-BOT_PRESETS = {
+# defined in `app/engine_personas.py`. Keys are lowercase and the table itself is
+# read-only (the dev presets endpoint edits the preset dicts in place).
+BOT_PRESETS = types.MappingProxyType({
     'human': {
         'display_name': 'Human',
         'engine_persona': None,
@@ -54,94 +294,321 @@ BOT_PRESETS = {
         'engine_skill': 12,
         'engine_time': 0.5,
     },
+})
+
+
+def get_preset(name):
+    """The BOT_PRESETS entry for `name`, case-insensitively; None if unknown."""
+    return BOT_PRESETS.get(name.lower()) if isinstance(name, str) else None
+
+# Blunders each persona may make per game (lowercased persona name); others get 0.
+# Kept out of BOT_PRESETS, which is served as-is by /api/dev/presets.
+_BLUNDER_BUDGET = {
+    'grasshopper': 3,
+    'student': 2,
+    'adept': 1,
+    'ninja': 1,
+    'sensei': 0,
 }
 
 
-def derive_end_state(board: chess.Board):
+# Shared state payload: one header byte, then 2 bytes per move (see _pack_move).
+# b'M' = moves from the standard start; b'F' + FEN + b'\n' = moves from a custom setup.
+_STATE_MOVES = b'M'
+_STATE_FEN = b'F'
+# The state file is memory-mapped and starts with (write generation, payload
+# length); the payload follows. Mapped in 4 KiB steps, enough for ~2000 plies.
+_STATE_HDR = struct.Struct('<II')
+_STATE_MAP_STEP = 4096
+
+
+# Square names and promotion suffixes for building UCI strings (see ChessGame.legal_moves)
+_SQUARE_NAMES = tuple(chess.SQUARE_NAMES)
+_PROMO_SUFFIX = {None: '', chess.QUEEN: 'q', chess.ROOK: 'r', chess.BISHOP: 'b', chess.KNIGHT: 'n'}
+
+
+def _pack_move(move: chess.Move) -> bytes:
+    """from | to << 6 | promotion piece type << 12, little-endian u16."""
+    return struct.pack('<H', move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12))
+
+
+# Moves are never mutated, so replays and user moves can share parsed instances
+@functools.lru_cache(maxsize=8192)
+def _unpack_move(u16: int) -> chess.Move:
+    return chess.Move(u16 & 63, (u16 >> 6) & 63, (u16 >> 12) or None)
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_uci(uci: str) -> chess.Move:
+    return chess.Move.from_uci(uci)
+
+
+def might_be_over(board: chess.Board) -> bool:
+    """Cheap pre-check: False only when board.outcome(claim_draw=True) must be None.
+
+    outcome(claim_draw=True) is expensive mostly because of the threefold-claim
+    scan, which tries every legal move. A claimable repetition needs at least
+    7 reversible plies (a cycle takes 4 plies and the position must occur three
+    times, counting the one reached by the claiming move). Everything else is
+    checked exactly: mate needs check, stalemate means no legal move at all, and
+    insufficient material is a bitboard test.
+    """
+    return (
+        board.halfmove_clock >= 7
+        or board.is_check()
+        or board.is_insufficient_material()
+        or not any(board.generate_legal_moves())
+    )
+
+
+# chess.Termination -> short termination string used in results and PGN headers
+_TERM_NAMES = {
+    chess.Termination.CHECKMATE: 'checkmate',
+    chess.Termination.STALEMATE: 'stalemate',
+    chess.Termination.INSUFFICIENT_MATERIAL: 'insufficient_material',
+    chess.Termination.THREEFOLD_REPETITION: 'threefold_repetition',
+    chess.Termination.FIVEFOLD_REPETITION: 'fivefold_repetition',
+    chess.Termination.FIFTY_MOVES: 'fifty_moves',
+    chess.Termination.SEVENTYFIVE_MOVES: 'seventyfive_moves',
+}
+
+
+def derive_end_state(board: chess.Board, may_repeat=True):
     """Return (result_str, termination_str) derived from the given board outcome.
 
     Uses python-chess board.outcome(claim_draw=True) as the source of truth.
     Returns (result, termination) where result is one of '1-0','0-1','1/2-1/2'
     and termination is a short string like 'checkmate','stalemate','insufficient_material','threefold_repetition','fifty_moves', or None.
+    Pass may_repeat=False when the caller knows no position since the last
+    irreversible move has occurred twice; the threefold-claim scan is skipped then.
+    """
+    if not might_be_over(board):
+        return None, None
+    # Draw claims need at least 7 reversible plies (see might_be_over); below
+    # that, skip the claim checks and their repetition scan. A fifty-move
+    # claim needs 99.
+    clock = board.halfmove_clock
+    outcome = board.outcome(claim_draw=clock >= 99 or (clock >= 7 and may_repeat))
+    if outcome is None:
+        return None, None
+    # result
+    if outcome.winner is True:
+        res = '1-0'
+    elif outcome.winner is False:
+        res = '0-1'
+    else:
+        res = '1/2-1/2'
+
+    t = outcome.termination
+    # fallback to enum name lowercased when unknown
+    term = _TERM_NAMES.get(t) or t.name.lower()
+    return res, term
+
+
+# (local day ordinal, 'YYYY.MM.DD') of the last PGN Date header
+_PGN_DATE = (None, None)
+
+
+def _pgn_date(now: datetime.datetime) -> str:
+    """PGN Date tag value for `now`, formatted once per day."""
+    global _PGN_DATE
+    day = now.toordinal()
+    if _PGN_DATE[0] != day:
+        _PGN_DATE = (day, now.strftime('%Y.%m.%d'))
+    return _PGN_DATE[1]
+
+
+def _summarize_analysis(info, first=0):
+    """analyze_position's payload for an engine analysis `info`.
+
+    With first=1 it describes the position after the PV's first move instead
+    (same search, one ply shorter).
     """
+    result = {'score': None, 'best_move': None, 'continuation': []}
     try:
-        outcome = board.outcome(claim_draw=True)
-        if outcome is None:
-            return None, None
-        # result
-        if outcome.winner is True:
-            res = '1-0'
-        elif outcome.winner is False:
-            res = '0-1'
-        else:
-            res = '1/2-1/2'
-
-        term = None
-        t = outcome.termination
-        # Map common terminations to friendly names
-        if t == chess.Termination.CHECKMATE:
-            term = 'checkmate'
-        elif t == chess.Termination.STALEMATE:
-            term = 'stalemate'
-        elif t == chess.Termination.INSUFFICIENT_MATERIAL:
-            term = 'insufficient_material'
-        elif t == chess.Termination.THREEFOLD_REPETITION:
-            term = 'threefold_repetition'
-        elif t == chess.Termination.FIVEFOLD_REPETITION:
-            term = 'fivefold_repetition'
-        elif t == chess.Termination.FIFTY_MOVES:
-            term = 'fifty_moves'
-        elif t == chess.Termination.SEVENTY_FIVE_MOVES:
-            term = 'seventyfive_moves'
-        else:
-            # fallback to enum name lowercased when unknown
+        # Extract PV moves if present
+        pv = info.get('pv') if isinstance(info, dict) else None
+        if len(pv or ()) > first:
             try:
-                term = t.name.lower()
+                result['best_move'] = pv[first].uci()
+                result['continuation'] = [m.uci() for m in pv[first:first + 3]]
             except Exception:
-                term = None
+                pass
 
-        return res, term
+        # Extract score and normalize to white-perspective centipawns
+        score_obj = info.get('score') if isinstance(info, dict) else None
+        if score_obj is not None:
+            try:
+                s = score_obj.pov(chess.WHITE)
+                # Mate handling
+                if hasattr(s, 'is_mate') and s.is_mate():
+                    try:
+                        m = s.mate()
+                        if m is None:
+                            result['score'] = None
+                        else:
+                            # Positive means mate for White, negative means mate for Black
+                            if m > 0:
+                                result['score'] = f"M{int(m)}"
+                            else:
+                                result['score'] = f"M-{int(abs(m))}"
+                    except Exception:
+                        result['score'] = None
+                else:
+                    # centipawn value (int). Use large mate substitute if needed.
+                    try:
+                        cp = s.score(mate_score=100000)
+                        if cp is None:
+                            result['score'] = None
+                        else:
+                            result['score'] = int(cp)
+                    except Exception:
+                        result['score'] = None
+            except Exception:
+                result['score'] = None
     except Exception:
-        return None, None
+        pass
 
+    return result
 
-class ChessGame:
-    def __init__(self):
-        self.board = chess.Board()
 
-        # =======================================================
-        # 1. SMART SWITCH: Detect OS and set Engine Path
-        # =======================================================
-        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        system = platform.system()  # Returns "Windows" or "Linux"
+# Seven-tag roster in PGN order with chess.pgn.Headers' defaults; filled by plain
+# string formatting instead of going through a Headers mapping per export.
+_PGN_ROSTER_DEFAULTS = {
+    'Event': '?',
+    'Site': '?',
+    'Date': '????.??.??',
+    'Round': '?',
+    'White': '?',
+    'Black': '?',
+    'Result': '*',
+}
+_PGN_ROSTER_TPL = '\n'.join(f'[{k} "{{{k}}}"]' for k in _PGN_ROSTER_DEFAULTS)
 
-        if system == "Windows":
-            # --- WINDOWS CONFIG (local machine) ---
-            # Use project-relative path to the bundled Windows Stockfish binary
-            self.engine_path = os.path.join(root, 'stockfish', 'stockfish-windows-x86-64-avx2.exe')
 
-            # Windows uses a local file for the game state
-            self.state_file_path = "game_state.fen"
+def board_to_pgn(board: chess.Board, headers=None) -> str:
+    """Export `board`'s move stack as PGN text without building a chess.pgn.Game tree.
+
+    Output matches StringExporter(headers=True, variations=False, comments=False):
+    seven-tag roster first, then FEN/SetUp for non-standard starts and any other
+    headers, movetext wrapped at 80 columns and terminated by the result.
+    """
+    tmp = board.root()
+    roster = dict(_PGN_ROSTER_DEFAULTS)
+    extra = []
+    start_fen = tmp.fen()
+    if start_fen != chess.STARTING_FEN:
+        extra.append(f'[FEN "{start_fen}"]')
+        extra.append('[SetUp "1"]')
+    for k, v in (headers or {}).items():
+        if k in roster:
+            roster[k] = v
         else:
-            # --- LINUX CONFIG (server) ---
-            self.engine_path = os.path.join(root, 'stockfish', 'stockfish-ubuntu-x86-64')
+            extra.append(f'[{k} "{v}"]')
+
+    lines = [_PGN_ROSTER_TPL.format_map(roster)]
+    lines.extend(extra)
+    lines.append('')
+
+    # Same wrapping rule as StringExporter: tokens carry a trailing space and a
+    # line is flushed when the next token would not fit in 80 columns.
+    tokens = []
+    first = True
+    for mv in board.move_stack:
+        if tmp.turn == chess.WHITE:
+            tokens.append(f'{tmp.fullmove_number}. ')
+        elif first:
+            tokens.append(f'{tmp.fullmove_number}... ')
+        first = False
+        tokens.append(tmp.san_and_push(mv) + ' ')
+    tokens.append(f"{roster['Result']} ")
+
+    line = []
+    width = 0
+    for tok in tokens:
+        if 80 - width < len(tok):
+            lines.append(''.join(line).rstrip())
+            line = []
+            width = 0
+        line.append(tok)
+        width += len(tok)
+    lines.append(''.join(line).rstrip())
+    return '\n'.join(lines).rstrip()
+
+
+class ChessGame:
+    # Every attribute a game carries, including the FEN cache app.api keeps on it;
+    # __weakref__ for the _LIVE_GAMES table.
+    __slots__ = (
+        'board', 'game_id', 'engine_path', 'state_file_path',
+        '_state_mm', '_state_seen', '_outcome_cache', '_rep_counts',
+        '_engine', '_engine_jobs', '_engine_lock', '_ponder_limit', '_pending', '_engine_setup',
+        '_analysis_cache',
+        'last_best_eval', '_blunder_budget', '_applied_persona',
+        'status', 'end_reason', 'result', 'pgn_final', 'ended_at',
+        'user_name', 'opponent_name', 'user_side',
+        '_fen_cache', '_fen_cache_key',
+        '__weakref__',
+    )
+
+    def __init__(self, game_id=None, shared_state=True):
+        self.board = chess.Board()
+        # Optional id for per-session games; each id gets its own state file.
+        self.game_id = game_id
 
-            # Linux uses the RAM Disk (fast!) for game state
-            self.state_file_path = "/dev/shm/game_state.fen"
+        # 1. SMART SWITCH: OS-specific defaults (resolved at import)
+        self.engine_path = _DEFAULT_ENGINE_PATH
+        self.state_file_path = _DEFAULT_STATE_FILE_PATH
+
+        if game_id:
+            base, ext = os.path.splitext(self.state_file_path)
+            self.state_file_path = f"{base}_{game_id}{ext}"
+        # Headless games (simulations) keep their state in memory only.
+        if not shared_state:
+            self.state_file_path = None
+        # Mapping of the state file (opened on first use), and (generation, length,
+        # board, moves) as this game last read or wrote it; lets _load_state skip
+        # an unchanged state.
+        self._state_mm = None
+        self._state_seen = None
+        # (board, position key, result, termination) of the last derive_end_state()
+        self._outcome_cache = (None, None, None, None)
+        # (board, moves, transposition key -> occurrences since the last pawn move
+        # or capture, any position seen twice); see _may_repeat
+        self._rep_counts = (None, None, None, False)
 
         # =======================================================
         # 2. MASTER OVERRIDE (Optional)
         # =======================================================
         # If the server has a specific environment variable set, strictly use that.
-        if os.environ.get("STOCKFISH_PATH"):
-            self.engine_path = os.environ.get("STOCKFISH_PATH")
+        # Read per game: /api/engine_info expects it may change at runtime.
+        override = os.environ.get("STOCKFISH_PATH")
+        if override:
+            self.engine_path = override
 
         self._engine = None
+        # All engine work runs as jobs on this game's single engine thread (started
+        # on first use), so calls are serialized and a search can be queued
+        # without holding up the request thread. The lock guards its creation.
+        self._engine_jobs = None
+        self._engine_lock = threading.Lock()
+        # Search time of the last plain (no persona/skill) engine reply, and the
+        # (position key, time, future) of the search started on the user's move
+        self._ponder_limit = None
+        self._pending = None
+        # Analysis UIs re-query positions while stepping back and forth
+        self._analysis_cache = OrderedDict()
+        # (persona, skill) the persistent engine is currently configured for, None = defaults
+        self._engine_setup = None
         # Last best evaluation (centipawns) seen from engine analyses — used to detect
         # when the bot is in a winning/losing trend (for 'shark' behavior triggers).
         self.last_best_eval = 0
         # Track per-game blunder budget for personas: mapping persona->remaining allowed blunders
         self._blunder_budget = {}
+        # Persona and skill last applied to each engine handle, with the persona's
+        # search params and blunder threshold: engine -> (persona, skill, cfg,
+        # blunder threshold, overrides version). Weak keys so discarded engines drop out.
+        self._applied_persona = weakref.WeakKeyDictionary()
         # Track game lifecycle state for finalization
         self.status = 'ACTIVE'  # or 'ENDED'
         self.end_reason = None
@@ -153,6 +620,62 @@ class ChessGame:
         self.opponent_name = 'Opponent'
         self.user_side = 'white'  # 'white' or 'black'
 
+    def _position_key(self):
+        # History length and last move as well, since repetition claims depend on
+        # more than the current position
+        stack = self.board.move_stack
+        return (len(stack), stack[-1] if stack else None, self.board._transposition_key())
+
+    def _end_state(self):
+        """derive_end_state(self.board), reused while the position is unchanged.
+
+        make_move, check_game_over and end_game all ask about the same position
+        back to back.
+        """
+        board = self.board
+        key = self._position_key()
+        cached = self._outcome_cache
+        if cached[0] is board and cached[1] == key:
+            return cached[2], cached[3]
+        res, term = derive_end_state(board, may_repeat=self._may_repeat())
+        self._outcome_cache = (board, key, res, term)
+        return res, term
+
+    def _may_repeat(self):
+        """False when no position since the last pawn move or capture has occurred
+        twice, in which case no threefold-repetition claim is possible.
+
+        The counts are carried over from the previous call when the board has just
+        one more move, so each move costs one transposition key instead of
+        python-chess's backward scan.
+        """
+        board = self.board
+        n = len(board.move_stack)
+        cached_board, cached_n, counts, repeated = self._rep_counts
+        if cached_board is board and cached_n == n:
+            return repeated
+        key = board._transposition_key()
+        if cached_board is board and cached_n == n - 1:
+            if board.halfmove_clock == 0:
+                # pawn move or capture: no earlier position can occur again
+                counts = {key: 1}
+                repeated = False
+            else:
+                counts[key] = counts.get(key, 0) + 1
+                repeated = repeated or counts[key] >= 2
+        else:
+            # Rebuild from the move stack, back to the last zeroing move
+            counts = {}
+            b = board.copy()
+            for i in range(min(board.halfmove_clock, n) + 1):
+                if i:
+                    b.pop()
+                k = b._transposition_key()
+                counts[k] = counts.get(k, 0) + 1
+            repeated = any(c >= 2 for c in counts.values())
+        self._rep_counts = (board, n, counts, repeated)
+        return repeated
+
     def check_game_over(self):
         """Return (is_over, reason, winner)
 
@@ -160,39 +683,33 @@ class ChessGame:
         winner: 'white'|'black'|None
         """
         # Prefer python-chess outcome() as the source of truth
-        try:
-            res, term = derive_end_state(self.board)
-            if res is None:
-                return False, None, None
-            # store result/termination for later PGN saving
-            try:
-                self.result = res
-                self.end_reason = term
-            except Exception:
-                pass
-            # map winner
-            if res == '1-0':
-                return True, term or 'checkmate', 'white'
-            if res == '0-1':
-                return True, term or 'checkmate', 'black'
-            # draw
-            return True, term or 'draw', None
-        except Exception:
+        res, term = self._end_state()
+        if res is None:
             return False, None, None
+        # store result/termination for later PGN saving
+        self.result = res
+        self.end_reason = term
+        # map winner
+        if res == '1-0':
+            return True, term or 'checkmate', 'white'
+        if res == '0-1':
+            return True, term or 'checkmate', 'black'
+        # draw
+        return True, term or 'draw', None
 
     def end_game(self, reason, winner=None, user_side=None, user_name=None, opponent_name=None):
         self._load_state()  # Sync history first
 
         """Finalize the game exactly once and return payload with final PGN."""
-        if getattr(self, 'status', None) == 'ENDED':
+        if self.status == 'ENDED':
             return {'game_over': True, 'reason': self.end_reason, 'result': self.result, 'pgn': self.pgn_final}
 
         self.status = 'ENDED'
         
         # 1. Normalize Inputs (Use stored info with parameter override)
-        u_side = str(user_side).lower() if user_side else getattr(self, 'user_side', 'white')
-        p_name = user_name if user_name else getattr(self, 'user_name', 'Player')
-        o_name = opponent_name if opponent_name else getattr(self, 'opponent_name', 'Opponent')
+        u_side = str(user_side).lower() if user_side else self.user_side
+        p_name = user_name if user_name else self.user_name
+        o_name = opponent_name if opponent_name else self.opponent_name
 
         # 2. Determine Result
         if reason == 'resign':
@@ -205,99 +722,153 @@ class ChessGame:
             else:
                 self.result = '*'
         else:
-            try:
-                res, term = derive_end_state(self.board)
-                if res is not None:
-                    self.result = res
-                    self.end_reason = term
-                else:
-                    self.end_reason = reason
-                    self.result = self.board.result() if self.board.is_game_over() else '*'
-            except Exception:
+            res, term = self._end_state()
+            if res is not None:
+                self.result = res
+                self.end_reason = term
+            else:
                 self.end_reason = reason
-                self.result = '*'
+                self.result = self.board.result() if self.board.is_game_over() else '*'
 
         # 3. Build Clean PGN with Correct Names
+        now = datetime.datetime.now()
         try:
-            g = chess.pgn.Game()
+            headers = {}
             
             # Metadata
-            g.headers['Event'] = 'Casual Game'
-            g.headers['Site'] = "Wil's Chess"
-            g.headers['Date'] = datetime.datetime.now().strftime('%Y.%m.%d')
-            g.headers['Round'] = '1'
-            g.headers['Result'] = self.result or '*'
+            headers['Event'] = 'Casual Game'
+            headers['Site'] = "Wil's Chess"
+            headers['Date'] = _pgn_date(now)
+            headers['Round'] = '1'
+            headers['Result'] = self.result or '*'
             
             if self.end_reason:
-                g.headers['Termination'] = self.end_reason
+                headers['Termination'] = self.end_reason
 
             # --- NAME LOGIC ---
             # If user played White, they go in the White header.
             if u_side == 'white':
-                g.headers['White'] = p_name
-                g.headers['Black'] = o_name
+                headers['White'] = p_name
+                headers['Black'] = o_name
             # If user played Black, they go in the Black header.
             elif u_side == 'black':
-                g.headers['White'] = o_name
-                g.headers['Black'] = p_name
+                headers['White'] = o_name
+                headers['Black'] = p_name
             # Fallback: If side is unknown, we guess based on names or default
             else:
-                g.headers['White'] = p_name if p_name != 'Player' else 'White'
-                g.headers['Black'] = o_name if o_name != 'Opponent' else 'Black'
+                headers['White'] = p_name if p_name != 'Player' else 'White'
+                headers['Black'] = o_name if o_name != 'Opponent' else 'Black'
 
-            # Add Moves
-            node = g
-            for mv in self.board.move_stack:
-                node = node.add_variation(mv)
-            
-            exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
-            self.pgn_final = g.accept(exporter)
+            self.pgn_final = board_to_pgn(self.board, headers)
             
         except Exception:
             self.pgn_final = None
 
         try:
-            self.ended_at = datetime.datetime.now().isoformat()
+            self.ended_at = now.isoformat()
         except Exception:
             self.ended_at = None
 
         return {'game_over': True, 'reason': self.end_reason, 'result': self.result, 'pgn': self.pgn_final}
 
+    def _state_map(self, need=0):
+        """Map the shared state file, (re)mapping it large enough for `need` payload bytes."""
+        mm = self._state_mm
+        if mm is not None and len(mm) >= _STATE_HDR.size + need:
+            return mm
+        fd = os.open(self.state_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            want = -(-(_STATE_HDR.size + need) // _STATE_MAP_STEP) * _STATE_MAP_STEP
+            if size < want:
+                os.ftruncate(fd, want)
+                size = want
+            new = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if mm is not None:
+            mm.close()
+        self._state_mm = new
+        return new
+
+    def close_state(self):
+        """Unmap the state file (needed before it can be removed on Windows)."""
+        mm, self._state_mm = self._state_mm, None
+        self._state_seen = None
+        if mm is not None:
+            mm.close()
+
     def _load_state(self):
-        """Read the game state (Move List) from the shared file."""
+        """Read the game state (start position + move list) from the shared file."""
+        if not self.state_file_path:
+            return
         try:
-            if os.path.exists(self.state_file_path):
-                with open(self.state_file_path, "r") as f:
-                    content = f.read().strip()
-
-                # DETECT: Is this a custom setup (FEN) or a Move List?
-                if "/" in content:
-                    # It contains slashes, so it must be a FEN string (Custom Board)
-                    self.board.set_fen(content)
-                else:
-                    # It is a list of moves (Standard Game) - Replay them!
-                    self.board.reset()
-                    if content:
-                        for uci in content.split():
-                            if uci:
-                                self.board.push(chess.Move.from_uci(uci))
+            mm = self._state_map()
+            gen, n = _STATE_HDR.unpack_from(mm, 0)
+            # Skip the replay when the state is exactly as we last read or wrote
+            # it and the board has not been replaced or moved since.
+            seen = self._state_seen
+            if seen is not None and seen[2] is self.board and seen[:2] == (gen, n) and seen[3] == len(self.board.move_stack):
+                return
+            self._state_seen = None
+            if not n:
+                # nothing saved yet
+                return
+            # The replay may rewrite history behind an equal-looking position
+            self._outcome_cache = (None, None, None, None)
+            self._rep_counts = (None, None, None, False)
+            if _STATE_HDR.size + n > len(mm):
+                # another worker grew the file
+                mm = self._state_map(n)
+            data = mm[_STATE_HDR.size:_STATE_HDR.size + n]
+
+            # DETECT: Is this a custom setup (FEN header) or a standard game?
+            if data[:1] == _STATE_FEN:
+                end = data.index(b"\n")
+                self.board.set_fen(data[1:end].decode("ascii"))
+                moves = data[end + 1:]
+            else:
+                self.board.reset()
+                moves = data[1:]
+            push = self.board.push
+            for (u16,) in struct.iter_unpack("<H", moves[:len(moves) & ~1]):
+                push(_unpack_move(u16))
+            self._state_seen = (gen, n, self.board, len(self.board.move_stack))
         except Exception:
             pass
 
     def _save_state(self):
-        """Write the game state (Move List) to the shared file."""
+        """Write the game state (start position + move list) to the shared file."""
+        if not self.state_file_path:
+            return
         try:
-            # Smart Save: 
-            # 1. If we have moves, save the Move List (Preserves History/PGN).
-            # 2. If no moves but board is custom, save FEN (Preserves Custom Setup).
-            if not self.board.move_stack and self.board.fen() != chess.STARTING_FEN:
-                 data = self.board.fen()
+            stack = self.board.move_stack
+            seen = self._state_seen
+            self._state_seen = None
+            mm = self._state_map()
+            gen, n = _STATE_HDR.unpack_from(mm, 0)
+            # Fast path: one move on top of the list we last read/wrote, and nobody
+            # has rewritten the state since -> copy in just that move's 2 bytes.
+            if seen is not None and seen[2] is self.board and seen[3] == len(stack) - 1 and seen[:2] == (gen, n):
+                payload = _pack_move(stack[-1])
+                offset = n
             else:
-                 # Join all moves into a string like "e2e4 e7e5 g1f3"
-                 data = " ".join([m.uci() for m in self.board.move_stack])
-            
-            with open(self.state_file_path, "w") as f:
-                f.write(data)
+                # Full rewrite: header for the start position (custom setups keep
+                # their FEN so moves played from them replay correctly), then every move.
+                start_fen = self.board.root().fen() if stack else self.board.fen()
+                if start_fen == chess.STARTING_FEN:
+                    header = _STATE_MOVES
+                else:
+                    header = _STATE_FEN + start_fen.encode("ascii") + b"\n"
+                payload = header + b"".join([_pack_move(m) for m in stack])
+                offset = 0
+            n = offset + len(payload)
+            mm = self._state_map(n)
+            mm[_STATE_HDR.size + offset:_STATE_HDR.size + n] = payload
+            # Publish: readers go by the header, so write it after the payload
+            gen = (gen + 1) & 0xFFFFFFFF
+            _STATE_HDR.pack_into(mm, 0, gen, n)
+            self._state_seen = (gen, n, self.board, len(stack))
         except Exception:
             pass
 
@@ -306,9 +877,14 @@ class ChessGame:
         return self.board.fen()
 
     def legal_moves(self):
-        return [m.uci() for m in self.board.legal_moves]
+        # Same strings as Move.uci(), built from lookup tables
+        sq = _SQUARE_NAMES
+        pr = _PROMO_SUFFIX
+        return [sq[m.from_square] + sq[m.to_square] + pr[m.promotion] for m in self.board.generate_legal_moves()]
 
-    def make_move(self, uci):
+    def make_move(self, uci, prefetch=False):
+        # prefetch: the caller will ask for the engine's reply next, so start
+        # searching it now (see prefetch_after_user_move)
         # 1. Sync Start: Read the shared whiteboard so we know the current board state
         try:
             self._load_state()
@@ -316,19 +892,16 @@ class ChessGame:
             pass
 
         try:
-            move = chess.Move.from_uci(uci)
+            move = _parse_uci(uci)
         except Exception:
             return False, "invalid_uci"
-        if move in self.board.legal_moves:
+        if self.board.is_legal(move):
             self.board.push(move)
             # After pushing a move, derive and persist end-state (if any)
-            try:
-                res, term = derive_end_state(self.board)
-                if res is not None:
-                    self.result = res
-                    self.end_reason = term
-            except Exception:
-                pass
+            res, term = self._end_state()
+            if res is not None:
+                self.result = res
+                self.end_reason = term
 
             # 2. Sync End: Update the whiteboard so the other workers see the move
             try:
@@ -336,6 +909,8 @@ class ChessGame:
             except Exception:
                 pass
 
+            if prefetch and res is None:
+                self.prefetch_after_user_move()
             return True, None
         return False, "illegal"
 
@@ -345,6 +920,9 @@ class ChessGame:
 
         # Reset per-game budgets/ephemeral state
         self._blunder_budget = {}
+        self._outcome_cache = (None, None, None, None)
+        self._rep_counts = (None, None, None, False)
+        self._pending = None
 
         # Reset lifecycle/finalization state so previous END data cannot leak
         self.status = "ACTIVE"
@@ -357,42 +935,28 @@ class ChessGame:
         self.user_name = 'Player'
         self.opponent_name = 'Opponent'
         self.user_side = 'white'
-        
+
+        # New game: don't let the persistent engine search on the last game's hash
+        if self._engine is not None:
+            self._engine_submit(self._clear_hash)
+
         self._save_state()  # <--- FORCE SAVE (Wipe the whiteboard)
 
     def _allowed_blunders_for_persona(self, persona: str):
         # defaults per persona
-        try:
-            if not persona:
-                return 0
-            p = persona.lower()
-            if p == 'grasshopper':
-                return 3
-            if p == 'student':
-                return 2
-            if p == 'adept':
-                return 1
-            if p == 'ninja':
-                return 1
-            if p == 'sensei':
-                return 0
-        except Exception:
-            pass
-        return 0
+        return _BLUNDER_BUDGET.get(persona.lower(), 0) if isinstance(persona, str) else 0
 
     def _ensure_blunder_budget(self, persona: str):
-        if persona not in self._blunder_budget:
-            self._blunder_budget[persona] = self._allowed_blunders_for_persona(persona)
-        return self._blunder_budget[persona]
+        budget = self._blunder_budget
+        remaining = budget.get(persona)
+        if remaining is None:
+            remaining = budget[persona] = self._allowed_blunders_for_persona(persona)
+        return remaining
 
     def _decrement_blunder(self, persona: str):
-        try:
-            if persona not in self._blunder_budget:
-                self._ensure_blunder_budget(persona)
-            if self._blunder_budget.get(persona, 0) > 0:
-                self._blunder_budget[persona] -= 1
-        except Exception:
-            pass
+        remaining = self._ensure_blunder_budget(persona)
+        if remaining > 0:
+            self._blunder_budget[persona] = remaining - 1
 
     def engine_move(self, limit=0.1, engine_skill=None, engine_persona=None, rng_seed=None):
         """Ask the engine for a move.
@@ -409,104 +973,230 @@ class ChessGame:
 
         if not self.engine_path:
             return None
-        # Use a fresh engine instance per request to avoid stale engine state.
+        plain = engine_persona is None and engine_skill is None
+        # Search started on the user's move (see prefetch_after_user_move): a plain
+        # reply for this position and time is just its best move.
+        pending, self._pending = self._pending, None
+        self._ponder_limit = float(limit) if plain else None
+        if plain and pending is not None and pending[0] == self._position_key() and pending[1] >= float(limit):
+            try:
+                info = pending[2].result()
+            except Exception:
+                info = None
+            pv = info.get('pv') if info else None
+            if pv and self.board.is_legal(pv[0]):
+                self._remember_search(self.board, info, pending[1])
+                self.board.push(pv[0])
+                try:
+                    self._save_state()
+                except Exception:
+                    pass
+                return pv[0].uci()
+        # python-chess already bounds each engine command by its limit plus a grace
+        # period, so waiting on the job needs no timeout of its own.
+        return self._engine_submit(self._engine_move_job, limit, engine_skill, engine_persona, rng_seed).result()
+
+    def _engine_move_job(self, limit, engine_skill, engine_persona, rng_seed):
+        setup = (engine_persona, engine_skill) if (engine_persona or engine_skill is not None) else None
+        # One retry with a fresh engine if the persistent one died
+        for _ in range(2):
+            try:
+                eng = self._get_engine(setup)
+            except Exception:
+                return None
+            try:
+                return self.engine_move_with(eng, limit=limit, engine_skill=engine_skill, engine_persona=engine_persona, rng_seed=rng_seed)
+            except (chess.engine.EngineTerminatedError, OSError):
+                self._drop_engine()
+        return None
+
+    def _engine_submit(self, fn, *args):
+        """Queue fn(*args) on this game's engine thread; returns its Future."""
+        with self._engine_lock:
+            if self._engine_jobs is None:
+                self._engine_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chess-engine')
+            return self._engine_jobs.submit(fn, *args)
+
+    def prefetch_after_user_move(self):
+        """Start searching the current position in the background.
+
+        Only once this game has an engine (i.e. it is playing one). After a plain
+        engine reply the search uses that reply's time and engine_move can play
+        its best move directly; after a persona reply it is a shallow search that
+        only warms the engine's hash for the real one.
+        """
+        if self._engine is None:
+            return
+        limit = self._ponder_limit
+        fut = self._engine_submit(self._prefetch_job, self.board.copy(), limit)
+        self._pending = (self._position_key(), limit, fut) if limit is not None else None
+
+    def _prefetch_job(self, board, limit):
+        eng = self._engine
+        if eng is None:
+            return None
         try:
-            eng = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+            if limit is None:
+                eng.analyse(board, chess.engine.Limit(depth=_PREFETCH_DEPTH))
+            elif self._engine_setup is None:
+                return eng.analyse(board, chess.engine.Limit(time=limit))
         except Exception:
-            return None
+            pass
+        return None
 
-        try:
-            # Apply numeric skill configuration if provided
-            if engine_skill is not None:
+    def _clear_hash(self):
+        if self._engine is not None:
+            try:
+                self._engine.configure({'Clear Hash': None})
+            except Exception:
+                self._drop_engine()
+
+    def _get_engine(self, setup=None):
+        """Return this game's persistent engine, starting it on first use.
+
+        `setup` is the (persona, skill) the caller is about to apply, or None for
+        the engine's defaults; options left over from a different setup are reset
+        first. Runs on the engine thread.
+        """
+        if self._engine is None:
+            eng = _take_spare_engine(self.engine_path)
+            if eng is None:
+                eng = popen_engine(self.engine_path)
+                _configure_base_options(eng)
+            self._engine = eng
+            self._engine_setup = None
+            for other in _engine_used(self, started=True):
+                other.release_engine()
+        else:
+            _engine_used(self)
+        eng = self._engine
+        if setup != self._engine_setup:
+            if self._engine_setup is not None:
+                _restore_engine_defaults(eng)
+                self._applied_persona.pop(eng, None)
+            self._engine_setup = setup
+        return eng
+
+    def engine_move_with(self, eng, limit=0.1, engine_skill=None, engine_persona=None, rng_seed=None):
+        """Like engine_move, but search with an already-running engine owned by the caller.
+
+        Does not reload the shared state first and does not quit `eng`; used by
+        simulations that keep one engine per side for a whole game.
+        """
+        # Persona/skill options already on this engine from its previous move are
+        # not re-sent (the persona's are applied after the skill and win over it,
+        # so the pair together fixes the engine's options)
+        # (an override edit since then means the persona must be configured again)
+        applied = self._applied_persona.get(eng)
+        version = overrides_version()
+        same = applied is not None and applied[0] == engine_persona and applied[1] == engine_skill and applied[4] == version
+
+        # Apply numeric skill configuration if provided
+        if engine_skill is not None and not same:
+            if not engine_persona:
+                self._applied_persona[eng] = (None, engine_skill, None, None, version)
+            try:
+                eng.configure({"Skill Level": int(engine_skill)})
+            except Exception:
                 try:
-                    eng.configure({"Skill Level": int(engine_skill)})
+                    eng.configure({"UCI_LimitStrength": True, "UCI_Elo": 1200 + int(engine_skill) * 50})
                 except Exception:
-                    try:
-                        eng.configure({"UCI_LimitStrength": True, "UCI_Elo": 1200 + int(engine_skill) * 50})
-                    except Exception:
-                        pass
+                    pass
 
-            # If persona provided, configure engine via persona helper and use its search params
-            if engine_persona:
+        # If persona provided, configure engine via persona helper and use its search params
+        if engine_persona:
+            try:
+                # set RNG seed for deterministic/stochastic sampling
                 try:
-                    # set RNG seed for deterministic/stochastic sampling
-                    try:
-                        set_rng_seed(rng_seed)
-                    except Exception:
-                        pass
+                    set_rng_seed(rng_seed)
+                except Exception:
+                    pass
+                # Each side of a simulation keeps one persona on one engine, so
+                # the persona's options are usually sent only the first time
+                if same:
+                    cfg, blunder_thr = applied[2], applied[3]
+                else:
                     cfg = configure_persona(eng, engine_persona)
-                    # initialize blunder budget for this persona for the current game
-                    remaining = self._ensure_blunder_budget(engine_persona)
-                    enforce_no_blunder = (remaining <= 0)
-                    blunder_thr = cfg.get('mercy', {}).get('eval_gap_threshold', 150) if cfg.get('mercy') else 150
+                    mercy = cfg.get('mercy')
+                    blunder_thr = mercy.get('eval_gap_threshold', 150) if mercy else 150
+                    self._applied_persona[eng] = (engine_persona, engine_skill, cfg, blunder_thr, version)
+                # initialize blunder budget for this persona for the current game
+                remaining = self._ensure_blunder_budget(engine_persona)
+                enforce_no_blunder = (remaining <= 0)
 
-                    # --- Human Time Management: play faster in opening
-                    effective_limit = float(limit)
-                    try:
-                        if getattr(self.board, 'fullmove_number', 0) and self.board.fullmove_number < 10:
-                            effective_limit = effective_limit * 0.6
-                    except Exception:
-                        pass
+                # --- Human Time Management: play faster in opening
+                effective_limit = float(limit)
+                try:
+                    if self.board.fullmove_number < 10:
+                        effective_limit = effective_limit * 0.6
+                except Exception:
+                    pass
+
+                # Determine pick temperature and adjust for 'shark' and 'tilt' behaviors
+                pick_temp = float(cfg.get('pick_temperature', 0.0)) if cfg else 0.0
+                try:
+                    # Shark instinct: if already winning significantly and persona is stochastic
+                    if self.last_best_eval is not None and self.last_best_eval > 200 and pick_temp > 0.5:
+                        pick_temp = max(0.0, pick_temp - 0.5)
+                    # Tilt factor: if losing badly, increase randomness/aggression
+                    if self.last_best_eval is not None and self.last_best_eval < -300:
+                        pick_temp = pick_temp + 0.5
+                except Exception:
+                    pass
 
-                    # Determine pick temperature and adjust for 'shark' and 'tilt' behaviors
-                    pick_temp = float(cfg.get('pick_temperature', 0.0)) if cfg else 0.0
+                mv_res = pick_move_with_multipv(
+                    eng,
+                    self.board,
+                    depth=cfg.get('depth'),
+                    temperature=pick_temp,
+                    multipv=cfg.get('multipv', 10),
+                    mercy=cfg.get('mercy'),
+                    enforce_no_blunder=enforce_no_blunder,
+                    blunder_threshold=blunder_thr,
+                    blunder_cap=cfg.get('blunder_cap'),
+                    persona=engine_persona,
+                )
+                if mv_res:
+                    mv, sel_cp, best_cp, is_blunder = mv_res
+                    # Update last_best_eval from engine best cp if available
                     try:
-                        # Shark instinct: if already winning significantly and persona is stochastic
-                        if getattr(self, 'last_best_eval', 0) is not None and self.last_best_eval > 200 and pick_temp > 0.5:
-                            pick_temp = max(0.0, pick_temp - 0.5)
-                        # Tilt factor: if losing badly, increase randomness/aggression
-                        if getattr(self, 'last_best_eval', 0) is not None and self.last_best_eval < -300:
-                            pick_temp = pick_temp + 0.5
+                        if best_cp is not None:
+                            self.last_best_eval = int(best_cp)
                     except Exception:
                         pass
-
-                    mv_res = pick_move_with_multipv(
-                        eng,
-                        self.board,
-                        depth=cfg.get('depth'),
-                        temperature=pick_temp,
-                        multipv=cfg.get('multipv', 10),
-                        mercy=cfg.get('mercy'),
-                        enforce_no_blunder=enforce_no_blunder,
-                        blunder_threshold=blunder_thr,
-                        blunder_cap=cfg.get('blunder_cap'),
-                        persona=engine_persona,
-                    )
-                    if mv_res:
-                        mv, sel_cp, best_cp, is_blunder = mv_res
-                        # Update last_best_eval from engine best cp if available
+                    if mv:
+                        # If this move is a blunder, decrement the remaining budget
+                        if is_blunder:
+                            self._decrement_blunder(engine_persona)
+                        self.board.push(mv)
                         try:
-                            if best_cp is not None:
-                                self.last_best_eval = int(best_cp)
+                            self._save_state()
                         except Exception:
                             pass
-                        if mv:
-                            # If this move is a blunder, decrement the remaining budget
-                            if is_blunder:
-                                self._decrement_blunder(engine_persona)
-                            self.board.push(mv)
-                            try:
-                                self._save_state()
-                            except Exception:
-                                pass
-                            return mv.uci()
-                except Exception:
-                    pass
+                        return mv.uci()
+            except Exception:
+                pass
 
-            # Fallback: timed play on transient engine
+        # Fallback: plain timed play
+        move = None
+        if not engine_persona and engine_skill is None:
+            # Full strength, so the reply is the search's best move; analyse() gives
+            # the same search plus its score/PV, kept for analyze_position
+            info = eng.analyse(self.board, chess.engine.Limit(time=float(limit)))
+            pv = info.get('pv')
+            if pv:
+                move = pv[0]
+                self._remember_search(self.board, info, float(limit))
+        if move is None:
             r = eng.play(self.board, chess.engine.Limit(time=float(limit)))
-            if r and getattr(r, 'move', None):
-                self.board.push(r.move)
-                try:
-                    self._save_state()
-                except Exception:
-                    pass
-                return r.move.uci()
-        finally:
+            move = r.move if r else None
+        if move:
+            self.board.push(move)
             try:
-                eng.quit()
+                self._save_state()
             except Exception:
                 pass
+            return move.uci()
 
     def analyze_position(self, fen, time_limit=0.5):
         """Analyse a FEN position without making a move.
@@ -516,81 +1206,112 @@ class ChessGame:
           - best_move: UCI string of the best move (or None)
           - continuation: list of up to first 3 UCI moves from the PV
         """
+        return self.analyze_positions([fen], time_limit)[0]
+
+    def analyze_positions(self, fens, time_limit=0.5):
+        """analyze_position for each FEN in `fens`; returns the results in order.
+
+        Positions not already cached are queued on the engine thread together, so
+        they are searched back to back on the one engine and share its hash.
+        """
         # Basic defaults
-        result = {'score': None, 'best_move': None, 'continuation': []}
+        results = [{'score': None, 'best_move': None, 'continuation': []} for _ in fens]
         if not self.engine_path:
-            return result
-
+            return results
         try:
-            board = chess.Board(fen)
-        except Exception:
-            return result
+            time_limit = float(time_limit)
+        except (TypeError, ValueError):
+            return results
 
-        try:
-            eng = chess.engine.SimpleEngine.popen_uci(self.engine_path)
-        except Exception:
-            return result
+        cache = self._analysis_cache
+        jobs = []
+        for i, fen in enumerate(fens):
+            try:
+                board = chess.Board(fen)
+            except Exception:
+                continue
+            key = board.fen()
+            # Any earlier search of this position at least as long will do
+            hit = cache.get(key)
+            if hit is not None and hit[0] >= time_limit:
+                cache.move_to_end(key)
+                results[i] = {**hit[1], 'continuation': list(hit[1]['continuation'])}
+            else:
+                jobs.append((i, key, self._engine_submit(self._analyse_job, board, time_limit)))
 
-        try:
-            info = eng.analyse(board, chess.engine.Limit(time=float(time_limit)))
-            # Extract PV moves if present
-            pv = info.get('pv') if isinstance(info, dict) else None
-            if pv:
-                try:
-                    result['best_move'] = pv[0].uci()
-                    result['continuation'] = [m.uci() for m in pv[:3]]
-                except Exception:
-                    pass
+        for i, key, fut in jobs:
+            info = fut.result()
+            if info is None:
+                continue
+            result = results[i] = _summarize_analysis(info)
+            # Only keep real answers; a failed analysis is retried next time
+            if result['best_move'] is not None or result['score'] is not None:
+                self._cache_analysis(key, time_limit, result)
+        return results
 
-            # Extract score and normalize to white-perspective centipawns
-            score_obj = info.get('score') if isinstance(info, dict) else None
-            if score_obj is not None:
-                try:
-                    s = score_obj.pov(chess.WHITE)
-                    # Mate handling
-                    if hasattr(s, 'is_mate') and s.is_mate():
-                        try:
-                            m = s.mate()
-                            if m is None:
-                                result['score'] = None
-                            else:
-                                # Positive means mate for White, negative means mate for Black
-                                if m > 0:
-                                    result['score'] = f"M{int(m)}"
-                                else:
-                                    result['score'] = f"M-{int(abs(m))}"
-                        except Exception:
-                            result['score'] = None
-                    else:
-                        # centipawn value (int). Use large mate substitute if needed.
-                        try:
-                            cp = s.score(mate_score=100000)
-                            if cp is None:
-                                result['score'] = None
-                            else:
-                                result['score'] = int(cp)
-                        except Exception:
-                            result['score'] = None
-                except Exception:
-                    result['score'] = None
-        except Exception:
-            # analysis failed; return defaults
-            pass
-        finally:
+    def _cache_analysis(self, fen, time_limit, result):
+        cache = self._analysis_cache
+        old = cache.get(fen)
+        if old is not None and old[0] > time_limit:
+            return
+        cache[fen] = (time_limit, {**result, 'continuation': list(result['continuation'])})
+        cache.move_to_end(fen)
+        if len(cache) > _ANALYSIS_CACHE_MAX:
+            cache.popitem(last=False)
+
+    def _remember_search(self, board, info, time_limit):
+        """Keep a plain reply's search as analyses of the position before its move
+        and, via the rest of the PV, the position after it."""
+        pv = info.get('pv') if isinstance(info, dict) else None
+        if not pv:
+            return
+        self._cache_analysis(board.fen(), time_limit, _summarize_analysis(info))
+        # Only when the PV still gives a full continuation past the reply
+        if len(pv) > 3:
+            after = board.copy(stack=False)
+            after.push(pv[0])
+            self._cache_analysis(after.fen(), time_limit, _summarize_analysis(info, 1))
+
+    def _analyse_job(self, board, time_limit):
+        # One retry with a fresh engine if the persistent one died
+        for _ in range(2):
+            try:
+                eng = self._get_engine()
+            except Exception:
+                return None
+            try:
+                return eng.analyse(board, chess.engine.Limit(time=float(time_limit)))
+            except (chess.engine.EngineTerminatedError, OSError):
+                self._drop_engine()
+            except Exception:
+                # analysis failed; return defaults
+                return None
+        return None
+
+    def _drop_engine(self):
+        eng, self._engine = self._engine, None
+        self._engine_setup = None
+        with _LIVE_LOCK:
+            _LIVE_GAMES.pop(self, None)
+        if eng is not None:
             try:
                 eng.quit()
             except Exception:
                 pass
 
-        return result
+    def release_engine(self):
+        """Quit this game's engine once its queued engine work is done; the next
+        search starts a fresh one. Safe from any thread: the quit runs as a job on
+        the game's own engine thread."""
+        if self._engine is not None:
+            self._engine_submit(self._drop_engine)
 
     def close_engine(self):
-        try:
-            if self._engine:
-                self._engine.quit()
-                self._engine = None
-        except Exception:
-            pass
+        # Queued jobs are dropped; one already running fails fast once its engine quits
+        jobs, self._engine_jobs = self._engine_jobs, None
+        if jobs is not None:
+            jobs.shutdown(wait=False, cancel_futures=True)
+        self._drop_engine()
 
     def __del__(self):
         self.close_engine()
@@ -1,7 +1,12 @@
 import os
-import json
+import atexit
+import orjson
 import random
 import math
+import threading
+import types
+from bisect import bisect
+from itertools import accumulate
 import chess
 import chess.engine
 
@@ -9,11 +14,13 @@ import chess.engine
 _OVERRIDES_FILENAME = 'persona_overrides.json'
 
 
+_DATA_DIR = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), 'data')
+_OVERRIDES_PATH = os.path.join(_DATA_DIR, _OVERRIDES_FILENAME)
+
+
 def _overrides_file_path():
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    data_dir = os.path.join(root, 'data')
-    os.makedirs(data_dir, exist_ok=True)
-    return os.path.join(data_dir, _OVERRIDES_FILENAME)
+    os.makedirs(_DATA_DIR, exist_ok=True)
+    return _OVERRIDES_PATH
 
 
 def is_persona_allowed(name):
@@ -21,7 +28,10 @@ def is_persona_allowed(name):
         if not name:
             return False
         key = name.lower()
-        return key in list_personas()
+        if key in DEFAULT_PERSONAS:
+            return True
+        _ensure_loaded()
+        return key in _PERSONA_OVERRIDES
     except Exception:
         return False
 
@@ -105,24 +115,64 @@ DEFAULT_PERSONAS = {
     },
 }
 
+# The defaults are never edited at runtime (edits go to _PERSONA_OVERRIDES), so they
+# are shared read-only: curve weights become tuples and each persona and the table
+# itself are wrapped in read-only mappings.
+for _cfg in DEFAULT_PERSONAS.values():
+    if isinstance((_cfg.get('curve') or {}).get('weights'), list):
+        _cfg['curve']['weights'] = tuple(_cfg['curve']['weights'])
+DEFAULT_PERSONAS = types.MappingProxyType({k: types.MappingProxyType(v) for k, v in DEFAULT_PERSONAS.items()})
+del _cfg
+
 # Internal default engine time (seconds) used for persona-driven play when no explicit
 # UI control is provided. This is intentionally internal — the fast/deep selector was
 # removed from the UI to avoid inconsistent behavior across persona sampling.
 PERSONA_DEFAULT_ENGINE_TIME = 0.35
 
-# Runtime overrides (in-memory). Backed by `data/persona_overrides.json`.
+# Runtime overrides (in-memory). Backed by `data/persona_overrides.json`, which is
+# read on first use (see _ensure_loaded) rather than at import.
 _PERSONA_OVERRIDES = {}
+_OVERRIDES_LOADED = False
+
+# Default + override config per known persona key, built on first use; cleared
+# whenever the overrides change (as is the sorted name list).
+_MERGED_CACHE = {}
+_PERSONA_NAMES = None
+# Bumped on every override change; see overrides_version()
+_OVERRIDES_VERSION = 0
+
+
+def _overrides_changed():
+    global _PERSONA_NAMES, _OVERRIDES_VERSION
+    _MERGED_CACHE.clear()
+    _CURVE_CACHE.clear()
+    _PERSONA_NAMES = None
+    _OVERRIDES_VERSION += 1
+
+
+def overrides_version():
+    """Counter that changes whenever the persona overrides do, so a caller that
+    skips configure_persona for an already-configured engine knows when it must not."""
+    return _OVERRIDES_VERSION
+
+
+def _ensure_loaded():
+    if not _OVERRIDES_LOADED:
+        _load_persona_overrides()
 
 
 def _load_persona_overrides():
-    global _PERSONA_OVERRIDES
-    path = _overrides_file_path()
+    global _PERSONA_OVERRIDES, _OVERRIDES_LOADED
+    # reading needs no data dir; only saving creates it
+    path = _OVERRIDES_PATH
+    _OVERRIDES_LOADED = True
+    _overrides_changed()
     if not os.path.exists(path):
         _PERSONA_OVERRIDES = {}
         return
     try:
-        with open(path, 'r', encoding='utf-8') as fh:
-            data = json.load(fh) or {}
+        with open(path, 'rb') as fh:
+            data = orjson.loads(fh.read()) or {}
         # normalize keys to lowercase
         normalized = {}
         for k, v in data.items():
@@ -137,33 +187,88 @@ def _load_persona_overrides():
 def _save_persona_overrides():
     try:
         path = _overrides_file_path()
-        # write atomically
+        # write atomically: serialize once, one write + fsync, then swap in
         tmp = path + '.tmp'
-        with open(tmp, 'w', encoding='utf-8') as fh:
-            json.dump(_PERSONA_OVERRIDES, fh, indent=2, ensure_ascii=False)
-        os.replace(tmp, path)
+        # one writer at a time: a debounced save may fire during an import
+        with _WRITE_LOCK:
+            with open(tmp, 'wb') as fh:
+                fh.write(orjson.dumps(_PERSONA_OVERRIDES, option=orjson.OPT_INDENT_2))
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
         return True
     except Exception:
         return False
 
 
+# Single-persona edits (set/reset) come from the dev UI in bursts; they schedule
+# one save for _SAVE_DELAY seconds after the last edit instead of writing each
+# time. The save writes whatever the overrides are when it fires; a pending one
+# is flushed at exit.
+_SAVE_DELAY = 0.25
+_SAVE_TIMER = None
+_SAVE_LOCK = threading.Lock()
+_WRITE_LOCK = threading.Lock()
+
+
+def _schedule_save():
+    global _SAVE_TIMER
+    with _SAVE_LOCK:
+        if _SAVE_TIMER is not None:
+            _SAVE_TIMER.cancel()
+        _SAVE_TIMER = threading.Timer(_SAVE_DELAY, flush_persona_overrides)
+        _SAVE_TIMER.daemon = True
+        _SAVE_TIMER.start()
+
+
+def flush_persona_overrides():
+    """Write out a pending debounced save now (no-op when none is pending)."""
+    global _SAVE_TIMER
+    with _SAVE_LOCK:
+        timer, _SAVE_TIMER = _SAVE_TIMER, None
+    if timer is not None:
+        timer.cancel()
+        _save_persona_overrides()
+
+
+atexit.register(flush_persona_overrides)
+
+
 def list_personas():
-    # include any override keys in the persona list
-    names = set(k.lower() for k in DEFAULT_PERSONAS.keys())
-    names.update(k.lower() for k in _PERSONA_OVERRIDES.keys())
-    return sorted(list(names))
+    global _PERSONA_NAMES
+    names = _PERSONA_NAMES
+    if names is None:
+        _ensure_loaded()
+        # include any override keys in the persona list
+        names = set(k.lower() for k in DEFAULT_PERSONAS.keys())
+        names.update(k.lower() for k in _PERSONA_OVERRIDES.keys())
+        names = _PERSONA_NAMES = tuple(sorted(names))
+    return list(names)
+
+
+def _merged_config(key):
+    """The shared merged config for lowercase `key`; callers must not modify it."""
+    merged = _MERGED_CACHE.get(key)
+    if merged is None:
+        _ensure_loaded()
+        base = DEFAULT_PERSONAS.get(key)
+        over = _PERSONA_OVERRIDES.get(key)
+        if not over:
+            # nothing to merge: the read-only defaults themselves
+            merged = base if base is not None else {}
+        else:
+            # shallow merge
+            merged = dict(base or {})
+            merged.update(over)
+        if base is not None or over is not None:
+            _MERGED_CACHE[key] = merged
+    return merged
 
 
 def get_persona_config(name: str):
     if not name:
         return None
-    key = name.lower()
-    base = DEFAULT_PERSONAS.get(key, {})
-    over = _PERSONA_OVERRIDES.get(key, {})
-    # shallow merge
-    merged = dict(base)
-    merged.update(over)
-    return merged
+    return dict(_merged_config(name.lower()))
 
 
 def set_persona_override(name: str, params: dict):
@@ -176,10 +281,12 @@ def set_persona_override(name: str, params: dict):
     ok, err = validate_persona_override(key, params or {})
     if not ok:
         return False
+    _ensure_loaded()
     cur = dict(_PERSONA_OVERRIDES.get(key, {}))
     cur.update(params or {})
     _PERSONA_OVERRIDES[key] = cur
-    _save_persona_overrides()
+    _overrides_changed()
+    _schedule_save()
     return True
 
 
@@ -187,20 +294,149 @@ def reset_persona(name: str):
     if not name:
         return False
     key = name.lower()
+    _ensure_loaded()
     if key in _PERSONA_OVERRIDES:
         del _PERSONA_OVERRIDES[key]
-    _save_persona_overrides()
+        _overrides_changed()
+    _schedule_save()
     return True
 
 
 def export_persona_overrides():
     """Return a shallow copy of the current overrides dict for export or API consumption."""
     try:
+        _ensure_loaded()
         return dict(_PERSONA_OVERRIDES)
     except Exception:
         return {}
 
 
+# Field checks for validate_persona_override: each takes (field label, value) and
+# returns an error message, or None when the value is acceptable.
+def _check_int(minimum=None):
+    def check(label, v):
+        try:
+            n = int(v)
+        except Exception:
+            return f'{label} must be an integer'
+        if minimum is not None and n < minimum:
+            return f'{label} must be >= {minimum}'
+        return None
+    return check
+
+
+def _check_number(label, v):
+    try:
+        float(v)
+    except Exception:
+        return f'{label} must be a number'
+    return None
+
+
+def _check_prob(label, v):
+    try:
+        p = float(v)
+    except Exception:
+        return f'{label} must be a number'
+    if p < 0 or p > 1:
+        return f'{label} must be between 0 and 1'
+    return None
+
+
+def _check_fields(prefix, data, checks):
+    for k, v in data.items():
+        check = checks.get(k)
+        if check is not None:
+            err = check(prefix + k, v)
+            if err:
+                return err
+    return None
+
+
+def _check_uci(label, v):
+    if not isinstance(v, dict):
+        return 'uci must be an object'
+    for k, val in v.items():
+        if not isinstance(k, str):
+            return 'uci keys must be strings'
+        if not (isinstance(val, (str, int, float, bool)) or val is None):
+            return f"uci value for {k} must be scalar"
+    return None
+
+
+_MERCY_CHECKS = {
+    'mate_in': _check_int(0),
+    'mate_keep_prob': _check_prob,
+    'eval_gap_threshold': _check_int(0),
+    'eval_keep_prob': _check_prob,
+}
+
+
+def _check_mercy(label, v):
+    if v is None:
+        return None
+    if not isinstance(v, dict):
+        return 'mercy must be an object or null'
+    return _check_fields('mercy.', v, _MERCY_CHECKS)
+
+
+# allow endgame to carry pieces_threshold, depth_delta, temp_delta
+_ENDGAME_CHECKS = {
+    'pieces_threshold': _check_int(),
+    'depth_delta': _check_int(),
+    'temp_delta': _check_number,
+}
+
+
+def _check_endgame(label, v):
+    if not isinstance(v, dict):
+        return 'endgame must be an object'
+    return _check_fields('endgame.', v, _ENDGAME_CHECKS)
+
+
+def _check_curve(label, cur):
+    # curve (optional): allow persona move-selection curves
+    if cur is None:
+        return None
+    if not isinstance(cur, dict):
+        return 'curve must be an object or null'
+    # type must be 'table' or 'power'
+    if not isinstance(cur.get('type'), str):
+        return 'curve.type must be a string'
+    if cur['type'] not in ('table', 'power'):
+        return "curve.type must be 'table' or 'power'"
+    if cur['type'] == 'table':
+        if 'weights' not in cur:
+            return 'curve.weights must be provided for table type'
+        if not isinstance(cur['weights'], (list, tuple)):
+            return 'curve.weights must be a list'
+        if len(cur['weights']) < 1:
+            return 'curve.weights must contain at least one number'
+        for i, w in enumerate(cur['weights']):
+            err = _check_number(f'curve.weights[{i}]', w)
+            if err:
+                return err
+        return None
+    # power
+    if 'alpha' not in cur:
+        return 'curve.alpha must be provided for power type'
+    return _check_number('curve.alpha', cur['alpha'])
+
+
+_FIELD_CHECKS = {
+    'uci': _check_uci,
+    'depth': _check_int(1),
+    'pick_temperature': _check_number,
+    'multipv': _check_int(1),
+    'mercy': _check_mercy,
+    'endgame_depth_delta': _check_int(),
+    'endgame_temp_delta': _check_number,
+    'pieces_threshold': _check_int(),
+    'endgame': _check_endgame,
+    'curve': _check_curve,
+}
+
+
 def validate_persona_override(name: str, data: dict):
     """Validate a persona override dict. Returns (True, None) on success or (False, error_message).
 
@@ -212,148 +448,23 @@ def validate_persona_override(name: str, data: dict):
       - 'mercy': dict with optional keys 'mate_in'(int>=0), 'mate_keep_prob'(0..1 float), 'eval_gap_threshold'(int>=0), 'eval_keep_prob'(0..1 float)
       - 'endgame_depth_delta': int, 'endgame_temp_delta': number, 'pieces_threshold': int
       - 'endgame': dict with keys similar to above (optional)
+      - 'curve': null or dict with 'type' 'table' (+ 'weights' list) or 'power' (+ 'alpha')
     """
     if not isinstance(data, dict):
         return False, 'persona must be an object'
-    # uci
-    if 'uci' in data:
-        if not isinstance(data['uci'], dict):
-            return False, 'uci must be an object'
-        for k, v in data['uci'].items():
-            if not isinstance(k, str):
-                return False, 'uci keys must be strings'
-            if not (isinstance(v, (str, int, float, bool)) or v is None):
-                return False, f"uci value for {k} must be scalar"
-    # depth
-    if 'depth' in data:
-        try:
-            d = int(data['depth'])
-            if d < 1:
-                return False, 'depth must be >= 1'
-        except Exception:
-            return False, 'depth must be an integer'
-    # pick_temperature
-    if 'pick_temperature' in data:
-        try:
-            float(data['pick_temperature'])
-        except Exception:
-            return False, 'pick_temperature must be a number'
-    # multipv
-    if 'multipv' in data:
-        try:
-            m = int(data['multipv'])
-            if m < 1:
-                return False, 'multipv must be >= 1'
-        except Exception:
-            return False, 'multipv must be an integer'
-    # mercy
-    if 'mercy' in data and data['mercy'] is not None:
-        if not isinstance(data['mercy'], dict):
-            return False, 'mercy must be an object or null'
-        merc = data['mercy']
-        if 'mate_in' in merc:
-            try:
-                mi = int(merc['mate_in'])
-                if mi < 0:
-                    return False, 'mercy.mate_in must be >= 0'
-            except Exception:
-                return False, 'mercy.mate_in must be an integer'
-        if 'mate_keep_prob' in merc:
-            try:
-                p = float(merc['mate_keep_prob'])
-                if p < 0 or p > 1:
-                    return False, 'mercy.mate_keep_prob must be between 0 and 1'
-            except Exception:
-                return False, 'mercy.mate_keep_prob must be a number'
-        if 'eval_gap_threshold' in merc:
-            try:
-                eg = int(merc['eval_gap_threshold'])
-                if eg < 0:
-                    return False, 'mercy.eval_gap_threshold must be >= 0'
-            except Exception:
-                return False, 'mercy.eval_gap_threshold must be an integer'
-        if 'eval_keep_prob' in merc:
-            try:
-                p2 = float(merc['eval_keep_prob'])
-                if p2 < 0 or p2 > 1:
-                    return False, 'mercy.eval_keep_prob must be between 0 and 1'
-            except Exception:
-                return False, 'mercy.eval_keep_prob must be a number'
-    # endgame fields
-    if 'endgame_depth_delta' in data:
-        try:
-            int(data['endgame_depth_delta'])
-        except Exception:
-            return False, 'endgame_depth_delta must be an integer'
-    if 'endgame_temp_delta' in data:
-        try:
-            float(data['endgame_temp_delta'])
-        except Exception:
-            return False, 'endgame_temp_delta must be a number'
-    if 'pieces_threshold' in data:
-        try:
-            int(data['pieces_threshold'])
-        except Exception:
-            return False, 'pieces_threshold must be an integer'
-    if 'endgame' in data:
-        if not isinstance(data['endgame'], dict):
-            return False, 'endgame must be an object'
-        # allow endgame to carry pieces_threshold, depth_delta, temp_delta
-        eg = data['endgame']
-        if 'pieces_threshold' in eg:
-            try:
-                int(eg['pieces_threshold'])
-            except Exception:
-                return False, 'endgame.pieces_threshold must be an integer'
-        if 'depth_delta' in eg:
-            try:
-                int(eg['depth_delta'])
-            except Exception:
-                return False, 'endgame.depth_delta must be an integer'
-        if 'temp_delta' in eg:
-            try:
-                float(eg['temp_delta'])
-            except Exception:
-                return False, 'endgame.temp_delta must be a number'
-    # curve (optional): allow persona move-selection curves
-    if 'curve' in data and data['curve'] is not None:
-        if not isinstance(data['curve'], dict):
-            return False, 'curve must be an object or null'
-        cur = data['curve']
-        # type must be 'table' or 'power'
-        if 'type' not in cur or not isinstance(cur['type'], str):
-            return False, 'curve.type must be a string'
-        if cur['type'] not in ('table', 'power'):
-            return False, "curve.type must be 'table' or 'power'"
-        if cur['type'] == 'table':
-            if 'weights' not in cur:
-                return False, 'curve.weights must be provided for table type'
-            if not isinstance(cur['weights'], (list, tuple)):
-                return False, 'curve.weights must be a list'
-            if len(cur['weights']) < 1:
-                return False, 'curve.weights must contain at least one number'
-            for i, w in enumerate(cur['weights']):
-                try:
-                    float(w)
-                except Exception:
-                    return False, f'curve.weights[{i}] must be a number'
-        else:
-            # power
-            if 'alpha' not in cur:
-                return False, 'curve.alpha must be provided for power type'
-            try:
-                float(cur['alpha'])
-            except Exception:
-                return False, 'curve.alpha must be a number'
+    err = _check_fields('', data, _FIELD_CHECKS)
+    if err:
+        return False, err
     return True, None
 
 
-def import_persona_overrides(data: dict):
+def import_persona_overrides(data: dict, validate=True):
     """Import overrides from a dict, normalize keys, and persist to disk.
 
-    Returns True on success, False otherwise.
+    Pass validate=False when every entry has already been through
+    `validate_persona_override`. Returns True on success, False otherwise.
     """
-    global _PERSONA_OVERRIDES
+    global _PERSONA_OVERRIDES, _OVERRIDES_LOADED
     if not isinstance(data, dict):
         return False
     try:
@@ -366,11 +477,14 @@ def import_persona_overrides(data: dict):
                 continue
             normalized[k.lower()] = v
         # validate all entries before saving
-        for k, v in normalized.items():
-            ok, err = validate_persona_override(k, v)
-            if not ok:
-                return False
+        if validate:
+            for k, v in normalized.items():
+                ok, err = validate_persona_override(k, v)
+                if not ok:
+                    return False
         _PERSONA_OVERRIDES = normalized
+        _OVERRIDES_LOADED = True
+        _overrides_changed()
         return _save_persona_overrides()
     except Exception:
         return False
@@ -378,8 +492,10 @@ def import_persona_overrides(data: dict):
 
 def reset_all_persona_overrides():
     """Clear all persona overrides and persist the empty state."""
-    global _PERSONA_OVERRIDES
+    global _PERSONA_OVERRIDES, _OVERRIDES_LOADED
     _PERSONA_OVERRIDES = {}
+    _OVERRIDES_LOADED = True
+    _overrides_changed()
     return _save_persona_overrides()
 
 
@@ -395,7 +511,7 @@ def configure_persona(engine: chess.engine.SimpleEngine, persona: str):
             pass
         return {"depth": 12, "pick_temperature": 0.0, "multipv": 10}
 
-    cfg = get_persona_config(persona)
+    cfg = _merged_config(persona.lower())
     if not cfg:
         try:
             engine.configure({"MultiPV": 10})
@@ -454,16 +570,19 @@ def normalize_weights(ws):
 
     - Treats NaN/inf as 0. If sum is 0, returns uniform weights.
     """
-    out = []
-    for v in ws:
-        try:
-            fv = float(v)
-            if math.isfinite(fv) and fv > 0:
-                out.append(fv)
-            else:
+    ws = list(ws)
+    isfinite = math.isfinite
+    try:
+        out = [fv if fv > 0 and isfinite(fv) else 0.0 for fv in map(float, ws)]
+    except Exception:
+        # some entry is not a number: convert one at a time, counting failures as 0
+        out = []
+        for v in ws:
+            try:
+                fv = float(v)
+                out.append(fv if fv > 0 and isfinite(fv) else 0.0)
+            except Exception:
                 out.append(0.0)
-        except Exception:
-            out.append(0.0)
     s = sum(out)
     if s <= 0:
         # fallback to uniform positive weights
@@ -522,6 +641,25 @@ def make_curve_weights(curve, K):
     return [1.0] * K
 
 
+# make_curve_weights results for pick_move_with_multipv, keyed by (id(curve), K) and
+# holding the curve itself so a recycled id never matches. Curves come from the
+# persona configs, so this is cleared along with _MERGED_CACHE.
+_CURVE_CACHE = {}
+_CURVE_CACHE_MAX = 256
+
+
+def _curve_weights(curve, K):
+    key = (id(curve), K)
+    hit = _CURVE_CACHE.get(key)
+    if hit is not None and hit[0] is curve:
+        return hit[1]
+    weights = tuple(make_curve_weights(curve, K))
+    if len(_CURVE_CACHE) >= _CURVE_CACHE_MAX:
+        _CURVE_CACHE.clear()
+    _CURVE_CACHE[key] = (curve, weights)
+    return weights
+
+
 def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board, depth: int, temperature: float, multipv: int = 10, mercy: dict = None, enforce_no_blunder: bool = False, blunder_threshold: int = 150, blunder_cap: int = None, persona: str = None):
     """
     If temperature > 0, sample among top MultiPV moves with a soft weighting.
@@ -532,18 +670,16 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
         depth = 12
 
     # Phase-aware adjustments: if few pieces remain, make engine/persona softer
-    try:
-        # count pieces excluding kings
-        pieces = sum(1 for sq in board.piece_map().values() if sq.piece_type != chess.KING)
-    except Exception:
-        try:
-            pieces = len(board.piece_map()) - 2
-        except Exception:
-            pieces = 16
+    # count pieces excluding kings (straight from the bitboards)
+    pieces = chess.popcount(board.occupied & ~board.kings)
 
     # Persona-specific phase rules: reduce depth and increase temperature in endgames
+    # (the config is looked up once; the curve below reads it too)
+    try:
+        cfg = _merged_config(persona.lower()) if persona else None
+    except Exception:
+        cfg = None
     try:
-        cfg = get_persona_config(persona) if persona else None
         threshold = int(cfg.get('pieces_threshold', 10)) if cfg else 10
         depth_delta = int(cfg.get('endgame_depth_delta', -1)) if cfg else -1
         temp_delta = float(cfg.get('endgame_temp_delta', 0.3)) if cfg else 0.3
@@ -611,13 +747,10 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
 
     cps = [cp for _, cp, _ in candidates]
     best = cps[0]
-    weights = []
-    for cp, (_, _, mate_dist) in zip(cps, candidates):
-        delta = best - cp
-        # Use a softmax-like weighting based on centipawn difference and temperature
-        scale = max(0.0001, temperature)
-        w = math.exp(-(delta / 100.0) / scale)
-        weights.append(w)
+    # Use a softmax-like weighting based on centipawn difference and temperature
+    scale = max(0.0001, temperature)
+    exp = math.exp
+    weights = [exp(-((best - cp) / 100.0) / scale) for cp in cps]
 
     # Apply mercy rules if provided
     if mercy:
@@ -626,9 +759,9 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
             mate_in = mercy.get('mate_in')
             mate_keep = mercy.get('mate_keep_prob', 0.5)
             if mate_in is not None:
-                for i, (_, cp, mate_dist) in enumerate(candidates):
-                    if mate_dist is not None and abs(mate_dist) <= mate_in:
-                        weights[i] = weights[i] * float(mate_keep)
+                keep = float(mate_keep)
+                weights = [w * keep if md is not None and abs(md) <= mate_in else w
+                           for w, (_, _, md) in zip(weights, candidates)]
         except Exception:
             pass
 
@@ -648,9 +781,8 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
     move_choices = [m for m, _, _ in candidates]
     # Apply persona curve weights (by candidate rank) if configured
     try:
-        cfg = get_persona_config(persona) if persona else None
         curve = cfg.get('curve') if cfg else None
-        curve_ws = make_curve_weights(curve, len(weights))
+        curve_ws = _curve_weights(curve, len(weights))
         # multiply elementwise
         weights = [w * cw for w, cw in zip(weights, curve_ws)]
     except Exception:
@@ -659,11 +791,11 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
     # Normalize weights and guard against degenerate distributions
     weights = normalize_weights(weights)
 
-    try:
-        selected = _RNG.choices(move_choices, weights=weights, k=1)[0]
-    except Exception:
-        # fallback to global random
-        selected = random.choices(move_choices, weights=weights, k=1)[0]
+    # The same draw _RNG.choices(move_choices, weights=weights, k=1) makes (one
+    # random() scaled by the total, bisect_right over the running sums), so seeded
+    # games pick the same moves, minus its per-call list and argument handling
+    cum = list(accumulate(weights))
+    selected = move_choices[bisect(cum, _RNG.random() * cum[-1], 0, len(cum) - 1)]
 
     # find selected cp and best cp
     best_cp = candidates[0][1]
@@ -708,10 +840,3 @@ def pick_move_with_multipv(engine: chess.engine.SimpleEngine, board: chess.Board
 
     return selected, sel_cp, best_cp, is_blunder
 
-
-# Load overrides from disk at module import time
-try:
-    _load_persona_overrides()
-except Exception:
-    # ignore failures; runtime will operate with defaults
-    _PERSONA_OVERRIDES = {}
@@ -0,0 +1,193 @@
+"""Headless persona-vs-persona games.
+
+Kept separate from `app.api` so the functions here can run in worker processes:
+they only import chess + core modules, take plain arguments and return plain dicts.
+"""
+import datetime
+import os
+from contextlib import contextmanager
+
+from app.chess_core import ChessGame, board_to_pgn, might_be_over, popen_engine
+from app.engine_personas import PERSONA_DEFAULT_ENGINE_TIME, _load_persona_overrides
+
+
+_PERSONA_ENGINE_TIME = float(PERSONA_DEFAULT_ENGINE_TIME)
+
+
+def sim_move_time(persona, engine_time):
+    # Use internal persona default engine time when a persona is provided
+    return _PERSONA_ENGINE_TIME if persona else engine_time
+
+
+# Engine pairs kept open between games, keyed by engine path. Simulations run in
+# pool worker processes, so each worker reuses one pair for every game it plays.
+_ENGINES = {}
+
+
+def _quit_engines(engines):
+    for eng in engines:
+        try:
+            eng.quit()
+        except Exception:
+            pass
+
+
+def _spawn_engines(engine_path):
+    black = popen_engine(engine_path)
+    try:
+        white = popen_engine(engine_path)
+    except Exception:
+        black.quit()
+        raise
+    return (black, white)
+
+
+@contextmanager
+def sim_engines(engine_path):
+    """Engines for one headless game, one per side; yields them indexed by chess.Color.
+
+    The pair is parked in `_ENGINES` afterwards and reused (with a cleared hash) by
+    the next game in this process; it is discarded if the game raised.
+    """
+    engines = _ENGINES.pop(engine_path, None)
+    if engines is not None:
+        try:
+            # Start from an empty hash so a game doesn't search on its predecessor's tables
+            for eng in engines:
+                eng.configure({'Clear Hash': None})
+        except Exception:
+            _quit_engines(engines)
+            engines = None
+    if engines is None:
+        engines = _spawn_engines(engine_path)
+    try:
+        yield engines
+    except BaseException:
+        _quit_engines(engines)
+        raise
+    old = _ENGINES.pop(engine_path, None)
+    if old is not None:
+        _quit_engines(old)
+    _ENGINES[engine_path] = engines
+
+
+def _move_seed(rng_seed, ply):
+    if rng_seed is None:
+        return None
+    try:
+        return int(rng_seed) + ply
+    except Exception:
+        return rng_seed
+
+
+def _play(sim, white_persona, black_persona, engine_time, max_moves, rng_seed):
+    """Play up to `max_moves` plies on `sim`; returns (uci moves, stop reason)."""
+    # Per-side persona and move time, indexed by sim.board.turn (False=black, True=white)
+    personas = (black_persona, white_persona)
+    move_times = tuple(sim_move_time(p, engine_time) for p in personas)
+    move_list = []
+    reason = 'max_moves_reached'
+    board = sim.board
+    engine_move_with = sim.engine_move_with
+    try:
+        with sim_engines(sim.engine_path) as engines:
+            for i in range(max_moves):
+                # might_be_over() rules out most plies without the full outcome() scan
+                if might_be_over(board) and board.is_game_over():
+                    reason = 'game_over'
+                    break
+                side = int(board.turn)
+                mv = engine_move_with(engines[side], limit=move_times[side], engine_persona=personas[side], rng_seed=_move_seed(rng_seed, i))
+                if not mv:
+                    reason = 'engine_failed'
+                    break
+                move_list.append(mv)
+    except Exception:
+        reason = 'engine_failed'
+    return move_list, reason
+
+
+def run_simulation(white_persona, black_persona, engine_time, max_moves, rng_seed, outdir):
+    """Play one game, save its PGN under `outdir` and return the /api/simulate payload."""
+    # Worker processes outlive override edits made in the web process; re-read them.
+    _load_persona_overrides()
+
+    # Run simulation on a fresh, in-memory game instance
+    try:
+        sim = ChessGame(shared_state=False)
+    except Exception as e:
+        return {'ok': False, 'error': f'failed_to_create_game: {e}'}
+
+    move_list, reason = _play(sim, white_persona, black_persona, engine_time, max_moves, rng_seed)
+
+    # Build PGN
+    sim_result = sim.board.result() if sim.board.is_game_over() else '*'
+    try:
+        pgn_text = board_to_pgn(sim.board, {
+            'Event': 'Persona Simulation',
+            # Record selected personas as the player names in the PGN
+            'White': white_persona or 'White',
+            'Black': black_persona or 'Black',
+            'Result': sim_result,
+        })
+    except Exception:
+        pgn_text = None
+
+    # Auto-save PGN to games/tests/ with a timestamped filename
+    saved_fname = None
+    try:
+        if pgn_text:
+            now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            wp = (white_persona or 'white')
+            bp = (black_persona or 'black')
+            safe_wp = str(wp).replace(' ', '_')
+            safe_bp = str(bp).replace(' ', '_')
+            fname = f'sim_{safe_wp}_vs_{safe_bp}_{now}.pgn'
+            path = os.path.join(outdir, fname)
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write(pgn_text)
+            saved_fname = fname
+    except OSError:
+        saved_fname = None
+
+    return {'ok': True, 'moves': move_list, 'pgn': pgn_text, 'result': sim_result, 'reason': reason, 'saved_file': saved_fname}
+
+
+def run_batch_game(game_no, white_persona, black_persona, engine_time, max_moves, seed, outdir, fname):
+    """Play game `game_no` (0-based) of a /api/simulate_batch run and save its PGN as `fname`.
+
+    Returns {'ok': True, 'file', 'pgn', 'row'}; `file` is None and `error` says why
+    when the PGN could not be saved. {'ok': False, 'error'} when no game could be
+    set up.
+    """
+    _load_persona_overrides()
+
+    try:
+        sim = ChessGame(shared_state=False)
+    except Exception as e:
+        return {'ok': False, 'error': f'failed_to_create_game: {e}'}
+
+    _, reason = _play(sim, white_persona, black_persona, engine_time, max_moves, seed)
+    seed_used = _move_seed(seed, 0) if max_moves > 0 else None
+    result = sim.board.result() if sim.board.is_game_over() else '*'
+    # save PGN
+    pgn_text = board_to_pgn(sim.board, {
+        'Event': 'Persona Simulation',
+        'White': white_persona or 'White',
+        'Black': black_persona or 'Black',
+        # Add useful metadata headers for batch analysis
+        'WhitePersona': white_persona or '',
+        'BlackPersona': black_persona or '',
+        'Seed': str(seed_used) if seed_used is not None else '',
+        'GameNumber': str(game_no + 1),
+        'EngineTime': str(engine_time),
+        'Termination': reason or '',
+        'Result': result,
+    })
+    try:
+        with open(os.path.join(outdir, fname), 'w', encoding='utf-8') as fh:
+            fh.write(pgn_text)
+    except OSError as e:
+        return {'ok': True, 'file': None, 'error': f'save_failed: {e}'}
+    row = {'file': fname, 'white': white_persona, 'black': black_persona, 'result': result, 'moves': len(sim.board.move_stack), 'seed': seed_used, 'reason': reason}
+    return {'ok': True, 'file': fname, 'pgn': pgn_text, 'row': row}
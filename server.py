@@ -1,53 +1,141 @@
 from flask import Flask, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
 from pathlib import Path
 import json
 from app.api import api_bp
 import app.api as api_mod
+from app.chess_core import prewarm_engine
 import os
+import atexit
 import hashlib
+import logging
+import queue
+import orjson
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify() and request.get_json()
+    outside the API blueprint use the same fast path as its responses."""
+
+    def dumps(self, obj, **kwargs):
+        # Non-str keys are stringified, as json.dumps does. sort_keys and indent map
+        # onto orjson options and compact separators are orjson's own output (what
+        # Flask's response() passes); anything else goes through Flask's json.dumps.
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        indent = kwargs.pop('indent', None)
+        default = kwargs.pop('default', self.default)
+        if kwargs.get('separators') == (',', ':'):
+            del kwargs['separators']
+        if kwargs:
+            return super().dumps(obj, sort_keys=sort_keys, indent=indent, default=default, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _load_secret_key():
+    """SECRET_KEY from the environment, else the key persisted in data/secret_key
+    (generated on first start). Sessions carry the game id, so the key must be the
+    same across restarts and across worker processes."""
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    data_dir = Path(__file__).parent / 'data'
+    data_dir.mkdir(exist_ok=True)
+    path = data_dir / 'secret_key'
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    # Written under a private name and linked into place, so workers starting at the
+    # same time all end up with whichever key was linked first.
+    tmp = data_dir / f'secret_key.{os.getpid()}'
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(os.urandom(32))
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        tmp.unlink()
+    return path.read_bytes()
 
 
 def create_app():
     app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.json = OrjsonProvider(app)
+    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+    # Session cookie carries the per-session game id
+    app.secret_key = _load_secret_key()
     app.register_blueprint(api_bp)
+    api_mod.sweep_state_files()
+    # Start this worker's first engine now rather than on the first player move
+    prewarm_engine()
+
+    # Feedback entries are only queued by the request; a background listener (the
+    # same batching listener/handler as the engine debug log) keeps the file open
+    # and writes them out, flushing once the queue drains. Bounded to shed floods.
+    feedback_dir = Path(__file__).parent / 'feedback'
+    feedback_dir.mkdir(exist_ok=True)
+    feedback_queue = queue.Queue(maxsize=1000)
+    feedback_handler = api_mod._BatchedRotatingFileHandler(feedback_dir / 'user_feedback.txt', encoding='utf-8', delay=True)
+    feedback_listener = api_mod._BatchingQueueListener(feedback_queue, feedback_handler)
+    feedback_listener.start()
+    atexit.register(feedback_listener.stop)
 
     @app.route('/submit-feedback', methods=['POST'])
     def submit_feedback():
-        """Handle feedback submissions and save to file."""
+        """Handle feedback submissions and queue them for the feedback file."""
         try:
             data = request.get_json() or {}
             name = data.get('name', 'Anonymous')
             feedback = data.get('feedback', '')
 
-            # Create feedback directory if it doesn't exist
-            feedback_dir = Path(__file__).parent / 'feedback'
-            feedback_dir.mkdir(exist_ok=True)
-
             # Save to feedback file with timestamp
-            feedback_file = feedback_dir / 'user_feedback.txt'
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            with open(feedback_file, 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*60}\n")
-                f.write(f"Date: {timestamp}\n")
-                f.write(f"Name: {name}\n")
-                f.write(f"Feedback:\n{feedback}\n")
-                f.write(f"{'='*60}\n")
+            entry = (f"\n{'='*60}\n"
+                     f"Date: {timestamp}\n"
+                     f"Name: {name}\n"
+                     f"Feedback:\n{feedback}\n"
+                     f"{'='*60}")
+            try:
+                feedback_queue.put_nowait(logging.LogRecord('feedback', logging.INFO, __file__, 0, entry, None, None))
+            except queue.Full:
+                return jsonify({'status': 'error', 'message': 'busy'}), 503
 
             return jsonify({'status': 'success'}), 200
         except Exception as e:
             app.logger.exception('Error saving feedback')
             return jsonify({'status': 'error', 'message': str(e)}), 500
 
+    # main.js cache-busting version, re-hashed only when the file's (mtime, size) changes
+    main_js_path = os.path.join(app.static_folder, 'main.js')
+    main_js_version = {'key': None, 'ver': '1'}
+
     @app.get("/")
     def home():
-        # Compute a cache-busting version using an MD5 of the main.js contents
-        main_js_path = os.path.join(app.static_folder, 'main.js')
+        # Compute a cache-busting version using a BLAKE2b digest of the main.js contents
         try:
-            with open(main_js_path, 'rb') as fh:
-                data = fh.read()
-            version = hashlib.md5(data).hexdigest()
+            st = os.stat(main_js_path)
+            key = (st.st_mtime_ns, st.st_size)
+            if key != main_js_version['key']:
+                with open(main_js_path, 'rb') as fh:
+                    if hasattr(hashlib, 'file_digest'):
+                        # Python 3.11+: hashed in chunks without reading the file into one bytes object
+                        digest = hashlib.file_digest(fh, 'blake2b')
+                    else:
+                        digest = hashlib.blake2b(fh.read())
+                main_js_version['ver'] = digest.hexdigest()[:16]
+                main_js_version['key'] = key
+            version = main_js_version['ver']
         except Exception:
             version = '1'
         return render_template("index.html", main_js_version=version, v1_mode=api_mod.V1_MODE, debug_mode=app.debug)
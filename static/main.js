@@ -1209,7 +1209,8 @@ async function postMove(uci) {
 }
 
 async function postReset() {
-  const r = await fetch('/api/reset', {method: 'POST'});
+  // The UI only reads the FEN from a reset; skip the legal move list
+  const r = await fetch('/api/reset?exclude=legal', {method: 'POST'});
   return r.json();
 }
 
@@ -1843,7 +1844,14 @@ window.addEventListener('load', async () => {
         const payload = { white_persona: wp, black_persona: bp, count: count, engine_time: time, seed: seed };
         try{
           const r = await fetch('/api/simulate_batch', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
-          const j = await r.json();
+          let j;
+          if((r.headers.get('Content-Type') || '').includes('ndjson')){
+            // One line per finished game, then the batch summary as the last line
+            const lines = (await r.text()).trim().split('\n');
+            j = JSON.parse(lines[lines.length - 1]);
+          } else {
+            j = await r.json();
+          }
           if(!j.ok){ alert('Batch failed: '+(j.error||JSON.stringify(j))); return; }
           const sum = document.getElementById('sim_last_summary');
           sum.textContent = `Ran ${j.count} games. Files: ${j.files.join(', ')} CSV: ${j.csv}`;
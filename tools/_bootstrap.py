@@ -0,0 +1,8 @@
+# Put the project root on sys.path so the tools can import `app` and `server`
+# when run as scripts from tools/ (which puts only tools/ itself on the path).
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
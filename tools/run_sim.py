@@ -1,37 +1,38 @@
-from app.chess_core import ChessGame
-import chess
+from app.chess_core import ChessGame, board_to_pgn
 
 def run_sim(white='grasshopper', black='student', engine_time=0.05, max_moves=200, rng_seed=None):
     g = ChessGame()
     moves = []
+    # Loop invariants: the board object (engine_move updates it in place), the
+    # persona per side indexed by board.turn, and the per-ply seeds
+    board = g.board
+    is_over = board.is_game_over
+    engine_move = g.engine_move
+    personas = (black, white)
+    if rng_seed is None:
+        seeds = [None] * max_moves
+    else:
+        try:
+            seeds = [int(rng_seed) + i for i in range(max_moves)]
+        except Exception:
+            seeds = [rng_seed] * max_moves
     for i in range(max_moves):
-        if g.board.is_game_over():
+        if is_over():
             break
-        persona = white if g.board.turn==chess.WHITE else black
-        seed = None
-        if rng_seed is not None:
-            try:
-                seed = int(rng_seed) + i
-            except Exception:
-                seed = rng_seed
-        mv = g.engine_move(limit=engine_time, engine_persona=persona, rng_seed=seed)
+        mv = engine_move(limit=engine_time, engine_persona=personas[board.turn], rng_seed=seeds[i])
         if not mv:
             print('Engine failed or returned no move')
             break
         moves.append(mv)
     # Build PGN
-    import chess.pgn
-    pg = chess.pgn.Game()
-    pg.headers['Event']='Persona Simulation'
-    pg.headers['White']=white
-    pg.headers['Black']=black
-    pg.headers['Result']=g.board.result() if g.board.is_game_over() else '*'
-    node=pg
-    for m in g.board.move_stack:
-        node = node.add_variation(m)
-    exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
+    pgn_text = board_to_pgn(g.board, {
+        'Event': 'Persona Simulation',
+        'White': white,
+        'Black': black,
+        'Result': g.board.result() if g.board.is_game_over() else '*',
+    })
     print('--- PGN ---')
-    print(pg.accept(exporter))
+    print(pgn_text)
     print('--- First 10 moves ---')
     print(moves[:10])
 
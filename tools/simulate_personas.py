@@ -8,12 +8,13 @@ import sys
 import argparse
 import datetime
 import csv
-import chess.pgn
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import chess
 
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.insert(0, ROOT)
-
-from app.chess_core import ChessGame
+from _bootstrap import ROOT
+from app.chess_core import ChessGame, board_to_pgn, might_be_over
 try:
     from app.engine_personas import is_persona_allowed
 except Exception:
@@ -21,49 +22,86 @@ except Exception:
         return True
 
 
-def save_pgn(sim, white_persona, black_persona, outdir, idx=None):
-    g = chess.pgn.Game()
-    g.headers['Event'] = 'Persona Simulation'
-    g.headers['White'] = white_persona or 'White'
-    g.headers['Black'] = black_persona or 'Black'
-    g.headers['Result'] = sim.board.result() if sim.board.is_game_over() else '*'
-    node = g
-    try:
-        for mv in sim.board.move_stack:
-            node = node.add_variation(mv)
-    except Exception:
-        pass
-    exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
-    pgn_text = g.accept(exporter)
-    now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    safe_w = str(white_persona or 'white').replace(' ', '_')
-    safe_b = str(black_persona or 'black').replace(' ', '_')
+# Game result -> summary counter; unfinished games only count when the engine failed
+_RESULT_TO_KEY = {'1-0': 'white', '0-1': 'black', '1/2-1/2': 'draw'}
+
+
+def _safe_name(persona, default):
+    return str(persona or default).replace(' ', '_')
+
+
+def _pgn_filename(safe_w, safe_b, now_str, idx=None):
     if idx is None:
-        fname = f'sim_{safe_w}_vs_{safe_b}_{now}.pgn'
-    else:
-        fname = f'sim_{safe_w}_vs_{safe_b}_{now}_{idx}.pgn'
+        return f'sim_{safe_w}_vs_{safe_b}_{now_str}.pgn'
+    return f'sim_{safe_w}_vs_{safe_b}_{now_str}_{idx}.pgn'
+
+
+def save_pgn(board, white_persona, black_persona, outdir, now_str=None, idx=None, fname=None):
+    """Save `board` as a PGN under `outdir`; returns the file name.
+
+    `now_str` is the batch's start timestamp (default: now) and `idx` the game's
+    number within the batch, which keeps names unique within one batch. A batch
+    passes `fname` instead, from its own _pgn_filename.
+    """
+    pgn_text = board_to_pgn(board, {
+        'Event': 'Persona Simulation',
+        'White': white_persona or 'White',
+        'Black': black_persona or 'Black',
+        'Result': board.result() if board.is_game_over() else '*',
+    })
+    if fname is None:
+        if now_str is None:
+            now_str = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        fname = _pgn_filename(_safe_name(white_persona, 'white'), _safe_name(black_persona, 'black'), now_str, idx)
     path = os.path.join(outdir, fname)
     with open(path, 'w', encoding='utf-8') as fh:
         fh.write(pgn_text)
     return fname
 
 
-def run_one(white_persona, black_persona, engine_time, max_moves, base_seed):
-    sim = ChessGame()
+# This process's game, kept across games so its engine is only started once
+_WORKER_SIM = None
+
+
+def _init_worker():
+    global _WORKER_SIM
+    # In-memory state: parallel games must not share the web app's state file.
+    # Its engine is quit by app.chess_core's exit hook.
+    _WORKER_SIM = ChessGame(shared_state=False)
+
+
+def run_one(white_persona, black_persona, engine_time, max_moves, base_seed, sim=None):
+    """Play one game; returns (uci moves, stop reason, first seed used).
+
+    Plays on `sim` (default: this worker's game), reset first, so the engine is
+    reused from the previous game. Runs in a pool worker, so it returns plain
+    data rather than the game itself.
+    """
+    if sim is None:
+        if _WORKER_SIM is None:
+            _init_worker()
+        sim = _WORKER_SIM
+    # Fresh board and blunder budgets; the engine's hash is cleared too
+    sim.reset()
     reason = 'max_moves_reached'
     moves = []
     seed_used = None
+    # Indexed by board.turn (False=black, True=white)
+    personas = (black_persona, white_persona)
+    try:
+        base_int = int(base_seed) if base_seed is not None else None
+    except (TypeError, ValueError):
+        base_int = None
+    # engine_move plays onto this same board object
+    board = sim.board
     for i in range(max_moves):
-        if sim.board.is_game_over():
+        # might_be_over() rules out most plies without the full outcome() scan
+        if might_be_over(board) and board.is_game_over():
             reason = 'game_over'
             break
-        persona = white_persona if sim.board.turn == chess.WHITE else black_persona
-        seed = None
-        if base_seed is not None:
-            try:
-                seed = int(base_seed) + i
-            except Exception:
-                seed = base_seed
+        persona = personas[board.turn]
+        # A seed that isn't an integer is used as-is for every move
+        seed = base_seed if base_int is None else base_int + i
         if seed_used is None:
             seed_used = seed
         mv = sim.engine_move(limit=engine_time, engine_persona=persona, rng_seed=seed)
@@ -73,7 +111,30 @@ def run_one(white_persona, black_persona, engine_time, max_moves, base_seed):
         moves.append(mv)
     if seed_used is None:
         seed_used = base_seed
-    return sim, moves, reason, seed_used
+    return moves, reason, seed_used
+
+
+def _play_games(args):
+    """Yield (game index, run_one result or the exception it raised) as games finish."""
+    game_args = (args.white, args.black, args.engine_time, args.max_moves, args.seed)
+    if args.workers <= 1 or args.count <= 1:
+        sim = ChessGame(shared_state=False)
+        for i in range(args.count):
+            try:
+                yield i, run_one(*game_args, sim=sim)
+            except Exception as e:
+                yield i, e
+        sim.close_engine()
+        return
+    # Games are independent and engine-bound: play them in parallel, each worker
+    # keeping one game (and engine) for all the games it plays
+    with ProcessPoolExecutor(max_workers=min(args.workers, args.count), mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker) as ex:
+        futures = {ex.submit(run_one, *game_args): i for i in range(args.count)}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result()
+            except Exception as e:
+                yield futures[fut], e
 
 
 def main():
@@ -85,6 +146,7 @@ def main():
     p.add_argument('--max-moves', type=int, default=400, help='Max moves per game')
     p.add_argument('--seed', help='Base RNG seed (optional, integer)')
     p.add_argument('--csv', help='Path to CSV summary file (optional)')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Games to run in parallel (1 = in this process)')
     p.add_argument('--outdir', default=os.path.join(ROOT, 'games', 'tests'), help='Output directory for PGNs')
     args = p.parse_args()
 
@@ -98,25 +160,40 @@ def main():
     stats = {'white': 0, 'black': 0, 'draw': 0, 'errors': 0}
     saved = []
     rows = []
-    for i in range(args.count):
-        print(f'Running game {i+1}/{args.count} — {args.white} vs {args.black} (seed={args.seed})')
-        sim, moves, reason, seed_used = run_one(args.white, args.black, args.engine_time, args.max_moves, args.seed)
-        res = sim.board.result() if sim.board.is_game_over() else '*'
-        if res == '1-0':
-            stats['white'] += 1
-        elif res == '0-1':
-            stats['black'] += 1
-        elif res == '1/2-1/2':
-            stats['draw'] += 1
-        else:
-            if reason == 'engine_failed':
-                stats['errors'] += 1
-        fname = save_pgn(sim, args.white, args.black, args.outdir, idx=i+1)
+    # Everything but the game number is fixed for the batch
+    now_str = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    batch_filename = functools.partial(_pgn_filename, _safe_name(args.white, 'white'), _safe_name(args.black, 'black'), now_str)
+    save = functools.partial(save_pgn, white_persona=args.white, black_persona=args.black, outdir=args.outdir)
+    print(f'Running {args.count} games — {args.white} vs {args.black} (seed={args.seed})')
+    # PGNs are written in the background while the next game plays; the file
+    # names are fixed up front, and a failed write still surfaces below
+    writer = ThreadPoolExecutor(max_workers=1)
+    writes = []
+    for i, outcome in _play_games(args):
+        if isinstance(outcome, Exception):
+            print(f' Game {i+1} failed: {outcome}')
+            stats['errors'] += 1
+            continue
+        moves, reason, seed_used = outcome
+        board = chess.Board()
+        for mv in moves:
+            board.push_uci(mv)
+        res = board.result() if board.is_game_over() else '*'
+        key = _RESULT_TO_KEY.get(res)
+        if key is not None:
+            stats[key] += 1
+        elif reason == 'engine_failed':
+            stats['errors'] += 1
+        fname = batch_filename(i+1)
+        writes.append(writer.submit(save, board, fname=fname))
         saved.append((fname, res, reason))
-        move_count = len(sim.board.move_stack)
-        rows.append({'file': fname, 'white': args.white, 'black': args.black, 'result': res, 'moves': move_count, 'seed': seed_used, 'reason': reason})
+        rows.append({'file': fname, 'white': args.white, 'black': args.black, 'result': res, 'moves': len(moves), 'seed': seed_used, 'reason': reason})
         print(f' Game {i+1} finished: result={res} reason={reason} saved={fname}')
 
+    writer.shutdown()
+    for fut in writes:
+        fut.result()
+
     print('\nSummary:')
     print(f" White wins: {stats['white']}")
     print(f" Black wins: {stats['black']}")
@@ -134,8 +211,7 @@ def main():
             w = csv.DictWriter(cf, fieldnames=['file', 'white', 'black', 'result', 'moves', 'seed', 'reason'])
             if write_header:
                 w.writeheader()
-            for r in rows:
-                w.writerow(r)
+            w.writerows(rows)
         print('\nWrote CSV summary to', csv_path)
     except Exception as e:
         print('Failed to write CSV summary:', e)
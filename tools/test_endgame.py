@@ -1,6 +1,4 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import _bootstrap  # puts the project root on sys.path
 from server import create_app
 app = create_app()
 client = app.test_client()
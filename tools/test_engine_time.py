@@ -1,12 +1,9 @@
 import time
-import sys, os
-# ensure project root on sys.path so `app` package imports work when running from tools/
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import _bootstrap  # puts the project root on sys.path
 from app.chess_core import ChessGame
 
 
-def run_test(limit, persona=None, seed=None):
-    g = ChessGame()
+def run_test(g, limit, persona=None, seed=None):
     print('\n--- test: limit=%s persona=%s seed=%s ---' % (limit, persona, seed))
     print('engine_path:', g.engine_path)
     try:
@@ -17,10 +14,8 @@ def run_test(limit, persona=None, seed=None):
     except Exception as e:
         print('engine_move error:', e)
     finally:
-        try:
-            g.close_engine()
-        except Exception:
-            pass
+        # Back to the start position (and an empty hash) for the next combo
+        g.reset()
 
 
 if __name__ == '__main__':
@@ -33,7 +28,13 @@ if __name__ == '__main__':
         (0.2, 'Adept', None),
         (1.0, 'Adept', None),
     ]
-    for lim, persona, seed in combos:
-        run_test(lim, persona, seed)
+    # One game (and engine) for every combo; only the first move pays for the
+    # engine's startup. In-memory state, so resets don't touch the app's game.
+    g = ChessGame(shared_state=False)
+    try:
+        for lim, persona, seed in combos:
+            run_test(g, lim, persona, seed)
+    finally:
+        g.close_engine()
 
     print('\nFinished tests. Check engine_debug.log for engine internals if available.')
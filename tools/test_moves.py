@@ -1,13 +1,15 @@
 import requests
 
 BASE = 'http://127.0.0.1:5000'
+# games are per session, so keep the session cookie across calls
+HTTP = requests.Session()
 
 def reset():
-    r = requests.post(BASE + '/api/reset')
+    r = HTTP.post(BASE + '/api/reset')
     print('RESET', r.status_code, r.json())
 
 def move(uci, engine=False):
-    r = requests.post(BASE + '/api/move', json={'uci': uci, 'engine_reply': engine})
+    r = HTTP.post(BASE + '/api/move', json={'uci': uci, 'engine_reply': engine})
     try:
         print('MOVE', uci, r.status_code, r.json())
     except Exception as e:
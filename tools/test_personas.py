@@ -1,9 +1,5 @@
 # Small test for persona mercy and blunder budget behavior
-import os
-import sys
-proj_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-if proj_root not in sys.path:
-    sys.path.insert(0, proj_root)
+import _bootstrap  # puts the project root on sys.path
 
 import chess
 import chess.engine
@@ -13,7 +9,12 @@ import importlib
 
 print('Starting persona tests')
 
-# Monkeypatch SimpleEngine.popen_uci to return a fake engine object
+# Dummy object with .move, like chess.engine.PlayResult
+class PlayResult:
+    def __init__(self, move):
+        self.move = move
+
+# Monkeypatch chess_core.popen_engine to return a fake engine object
 class FakeEngine:
     def configure(self, cfg):
         # accept any configuration
@@ -21,21 +22,15 @@ class FakeEngine:
     def quit(self):
         pass
     def play(self, board, limit):
-        # Return a dummy object with .move
-        class R:
-            def __init__(self, move):
-                self.move = move
-        # choose a legal move if possible
-        for m in board.legal_moves:
-            return R(m)
-        return R(None)
+        # choose a legal move if possible; only the first one is generated
+        return PlayResult(next(iter(board.legal_moves), None))
 
 orig_popen = None
 try:
-    orig_popen = chess.engine.SimpleEngine.popen_uci
-    chess.engine.SimpleEngine.popen_uci = lambda path: FakeEngine()
+    orig_popen = chess_core.popen_engine
+    chess_core.popen_engine = lambda path: FakeEngine()
 except Exception as e:
-    print('Failed to monkeypatch SimpleEngine:', e)
+    print('Failed to monkeypatch popen_engine:', e)
 
 # Monkeypatch pick_move_with_multipv to simulate returns and handle enforce_no_blunder
 orig_pick = personas.pick_move_with_multipv
@@ -79,6 +74,6 @@ run_test('ninja', repeats=4, rng_seed=42)
 # restore
 personas.pick_move_with_multipv = orig_pick
 if orig_popen:
-    chess.engine.SimpleEngine.popen_uci = orig_popen
+    chess_core.popen_engine = orig_popen
 
 print('\nTests complete')